@@ -0,0 +1,202 @@
+from collections import OrderedDict
+import hashlib
+import threading
+import time
+from dbConfig import SQLitePool
+
+#--------------------------------------------AI response cache------------------------------------------------------#
+#
+# Two tiers:
+#   memory  - OrderedDict in LRU order, bounded by entry count and total bytes, entries expire after ttl
+#   sqlite  - optional, survives restarts and is shared by every worker pointing at the same file
+#
+# Concurrent misses for the same key are coalesced: the first caller computes,
+# the others wait for its result instead of making their own upstream call.
+#
+#-------------------------------------------------------------------------------------------------------------------#
+
+
+def normalize_prompt(prompt):
+    """Whitespace insensitive form of a prompt; case is kept, since `X` and `x` can be different questions"""
+    return " ".join(prompt.split())
+
+
+def cache_key(prompt, model):
+    return hashlib.sha256(f"{model}\0{normalize_prompt(prompt)}".encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class ResponseCache:
+    """TTL + LRU cache of model responses with single-flight misses"""
+
+    def __init__(self, max_entries=1024, max_bytes=16 * 1024 * 1024, ttl=3600, db_path=None, max_db_entries=100000):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.db_path = db_path
+        self.max_db_entries = max_db_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._flights = {}
+        self._pool = SQLitePool(db_path) if db_path else None
+        self._db_writes = 0
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "db_hits": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+        if db_path:
+            with self._pool.connection() as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS ai_cache ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS ix_ai_cache_expires_at ON ai_cache (expires_at)")
+
+    # ---------------------------------------------- public ---------------------------------------------- #
+
+    def get_or_compute(self, prompt, model, compute):
+        """Cached response for (prompt, model), calling compute() at most once per key at a time.
+
+        None results are returned but not cached.
+        """
+        key = cache_key(prompt, model)
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        with self._lock:
+            # Another leader may have finished between get() and here
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._stats["hits"] += 1
+                return entry[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._stats["misses"] += 1
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            if flight.value is not None:
+                self.put(key, flight.value)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                self._remove(key)
+                self._stats["expirations"] += 1
+
+        if not self.db_path:
+            return None
+        with self._pool.connection() as conn:
+            row = conn.execute(
+                "SELECT value, expires_at FROM ai_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+        if row is None:
+            return None
+        with self._lock:
+            self._stats["db_hits"] += 1
+            self._insert(key, row[0], row[1])
+        return row[0]
+
+    def put(self, key, value):
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._insert(key, value, expires_at)
+        if self.db_path:
+            with self._pool.connection() as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ai_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at)
+                )
+            self._db_writes += 1
+            if self._db_writes % 1000 == 0:
+                self._prune_db()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.db_path:
+            with self._pool.connection() as conn, conn:
+                conn.execute("DELETE FROM ai_cache")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["db_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_ratio"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["max_bytes"] = self.max_bytes
+        stats["ttl"] = self.ttl
+        stats["persistent"] = bool(self.db_path)
+        return stats
+
+    # ---------------------------------------------- internals ---------------------------------------------- #
+
+    def _insert(self, key, value, expires_at):
+        """Caller holds self._lock"""
+        if key in self._entries:
+            self._remove(key)
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (expires_at, value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        """Caller holds self._lock"""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _prune_db(self):
+        with self._pool.connection() as conn, conn:
+            conn.execute("DELETE FROM ai_cache WHERE expires_at <= ?", (time.time(),))
+            conn.execute(
+                "DELETE FROM ai_cache WHERE key IN ("
+                "SELECT key FROM ai_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_db_entries,)
+            )
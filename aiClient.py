@@ -0,0 +1,122 @@
+import threading
+import time
+
+#--------------------------------------------AI model clients------------------------------------------------------#
+#
+# Routes talk to the model through a client object with two methods:
+#
+#   generate(prompt, model=None, timeout=None) -> full response text, or None
+#   stream(prompt, model=None, timeout=None)   -> iterator of text chunks, as the model produces them
+#
+# timeout is the upstream request deadline in seconds.
+#
+# GeminiClient is the real thing; FakeModelClient replays a canned answer with
+# configurable latency so streaming and timing can be exercised offline.
+#
+# google.generativeai takes the better part of a second to import, so GeminiClient
+# imports and configures it on its first model call, not when the app starts;
+# workers that only serve auth and chat never load it.
+#
+#------------------------------------------------------------------------------------------------------------------#
+
+DEFAULT_MODEL = "gemini-1.5-flash"
+
+
+class AIConfigError(Exception):
+    """Raised when the model client can't be built, e.g. no API key is configured"""
+
+
+def _chunk_text(chunk):
+    """Text of one streamed chunk; chunks without text parts (e.g. safety stops) yield ''"""
+    try:
+        return chunk.text or ""
+    except (ValueError, AttributeError):
+        return ""
+
+
+def _request_options(timeout):
+    return {"timeout": timeout} if timeout else None
+
+
+class GeminiClient:
+    """google.generativeai backed client; one GenerativeModel is built per model name and reused"""
+
+    def __init__(self, api_key=None):
+        self.api_key = api_key
+        self._genai = None
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _sdk(self):
+        """Caller holds self._lock"""
+        if self._genai is None:
+            import google.generativeai as genai
+            if self.api_key:
+                genai.configure(api_key=self.api_key)
+            self._genai = genai
+        return self._genai
+
+    def model(self, name=None):
+        name = name or DEFAULT_MODEL
+        model = self._models.get(name)
+        if model is None:
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = self._models[name] = self._sdk().GenerativeModel(name)
+        return model
+
+    def generate(self, prompt, model=None, timeout=None):
+        response = self.model(model).generate_content(prompt, request_options=_request_options(timeout))
+        if response is None or not hasattr(response, 'text'):
+            return None
+        return response.text
+
+    def stream(self, prompt, model=None, timeout=None):
+        response = self.model(model).generate_content(
+            prompt, stream=True, request_options=_request_options(timeout)
+        )
+        for chunk in response:
+            text = _chunk_text(chunk)
+            if text:
+                yield text
+
+
+FAKE_RESPONSE = (
+    "Here is a **short** answer.\n"
+    "- first point\n"
+    "- second point\n"
+    "```python\n"
+    "def add(a, b):\n"
+    "    return a + b\n"
+    "```\n"
+    "That is *all*."
+)
+
+
+class FakeModelClient:
+    """Offline stand-in: streams `response_text` in `chunk_size` pieces.
+
+    `first_chunk_delay` simulates time-to-first-token and `chunk_delay` the gap
+    between later chunks, both in seconds.
+    """
+
+    def __init__(self, response_text=FAKE_RESPONSE, chunk_size=16, first_chunk_delay=0.0, chunk_delay=0.0):
+        self.response_text = response_text
+        self.chunk_size = chunk_size
+        self.first_chunk_delay = first_chunk_delay
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+
+    def generate(self, prompt, model=None, timeout=None):
+        return "".join(self.stream(prompt, model))
+
+    def stream(self, prompt, model=None, timeout=None):
+        self.calls += 1
+        if self.first_chunk_delay:
+            time.sleep(self.first_chunk_delay)
+        text = self.response_text
+        for start in range(0, len(text), self.chunk_size):
+            if start and self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield text[start:start + self.chunk_size]
@@ -0,0 +1,143 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+import queue
+import threading
+import time
+
+#--------------------------------------------AI execution layer------------------------------------------------------#
+#
+# Model calls run on a dedicated, bounded thread pool instead of the Flask request
+# thread. At most max_workers calls run at once and at most max_queue more may wait;
+# anything beyond that is rejected immediately with AIBusyError so a slow upstream
+# can't soak up every web worker. Every call carries a deadline (AITimeoutError),
+# which is also handed to the model call as its `timeout` keyword so the SDK gives
+# up at the same time and frees the pool thread.
+#
+#--------------------------------------------------------------------------------------------------------------------#
+
+
+class AIBusyError(Exception):
+    """Raised when the AI pool and its queue are full"""
+
+
+class AITimeoutError(Exception):
+    """Raised when a model call misses its deadline"""
+
+
+class AIExecutor:
+    def __init__(self, max_workers=8, max_queue=32, timeout=60, stream_timeout=120):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.stream_timeout = stream_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ai")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self._stats = {"in_flight": 0, "completed": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+
+    # ---------------------------------------------- admission ---------------------------------------------- #
+
+    def _admit(self):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["rejected"] += 1
+            raise AIBusyError("AI service is at capacity")
+        with self._lock:
+            self._stats["in_flight"] += 1
+
+    def _release(self, future):
+        self._slots.release()
+        with self._lock:
+            self._stats["in_flight"] -= 1
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self._stats["errors"] += 1
+            else:
+                self._stats["completed"] += 1
+
+    def _timed_out(self):
+        with self._lock:
+            self._stats["timeouts"] += 1
+        return AITimeoutError("AI call timed out")
+
+    # ---------------------------------------------- calls ---------------------------------------------- #
+
+    def call(self, fn, *args, timeout=None, **kwargs):
+        """Runs fn(*args, timeout=timeout, **kwargs) on the pool and waits for it.
+
+        Raises AIBusyError or AITimeoutError. A call still queued at its deadline is
+        cancelled; one already running is abandoned and its result discarded, and
+        fn's own timeout ends it upstream.
+        """
+        timeout = timeout or self.timeout
+        self._admit()
+        future = self._pool.submit(fn, *args, timeout=timeout, **kwargs)
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=timeout)
+        except FuturesTimeout:
+            future.cancel()
+            raise self._timed_out()
+
+    def stream(self, fn, *args, timeout=None, **kwargs):
+        """Runs the chunk iterator returned by fn(*args, timeout=timeout, **kwargs) on the pool.
+
+        Admission happens here, before the first chunk is requested, so callers can turn
+        AIBusyError into an HTTP error. Returns a generator of chunks that raises
+        AITimeoutError once the overall deadline passes; closing it stops the producer.
+        """
+        timeout = timeout or self.stream_timeout
+        deadline = time.monotonic() + timeout
+        self._admit()
+        chunks = queue.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            if cancelled.is_set():
+                return
+            iterator = None
+            try:
+                iterator = iter(fn(*args, timeout=timeout, **kwargs))
+                for chunk in iterator:
+                    if cancelled.is_set():
+                        return
+                    chunks.put(("chunk", chunk))
+                chunks.put(("end", None))
+            except Exception as e:
+                chunks.put(("error", e))
+                raise
+            finally:
+                close = getattr(iterator, "close", None)
+                if close:
+                    close()
+
+        future = self._pool.submit(produce)
+        future.add_done_callback(self._release)
+        return self._drain(chunks, cancelled, deadline)
+
+    def _drain(self, chunks, cancelled, deadline):
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise self._timed_out()
+                try:
+                    kind, value = chunks.get(timeout=remaining)
+                except queue.Empty:
+                    raise self._timed_out()
+                if kind == "chunk":
+                    yield value
+                elif kind == "error":
+                    raise value
+                else:
+                    return
+        finally:
+            cancelled.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["max_workers"] = self.max_workers
+        stats["max_queue"] = self.max_queue
+        stats["queued"] = max(stats["in_flight"] - self.max_workers, 0)
+        return stats
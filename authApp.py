@@ -1,14 +1,44 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from flask_migrate import Migrate, upgrade
+from dbConfig import ENGINE_OPTIONS, ReadSessions, database_url
+from serialization import FastJSONProvider, enable_compression, COMPRESS_MIN_BYTES
 import os
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows; start workers one at a time there
+    fcntl = None
+
 # Initialize Flask app
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///users.db'
+app.json = FastJSONProvider(app)  # compact, unsorted jsonify() (orjson when installed)
+# gzip/br for JSON and text responses of at least COMPRESS_MIN_BYTES (0 turns compression off)
+compress_min_bytes = int(os.environ.get('COMPRESS_MIN_BYTES', COMPRESS_MIN_BYTES))
+if compress_min_bytes > 0:
+    enable_compression(app, min_bytes=compress_min_bytes,
+                       gzip_level=int(os.environ.get('COMPRESS_GZIP_LEVEL', 5)))
+app.config['SQLALCHEMY_DATABASE_URI'] = database_url('DATABASE_URL', 'sqlite:///users.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Signs access tokens; set SECRET_KEY so tokens survive restarts and work across workers.
+# A random per-process key is only allowed for a single worker: with CHAT_MESSAGE_QUEUE set
+# (several workers), a token issued by one would be rejected by the others.
+if not os.environ.get('SECRET_KEY') and os.environ.get('CHAT_MESSAGE_QUEUE'):
+    raise RuntimeError("SECRET_KEY must be set when CHAT_MESSAGE_QUEUE runs several workers")
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY') or os.urandom(32).hex()
+# Notifications live in their own file, reached through the same db object (Notification.__bind_key__)
+app.config['SQLALCHEMY_BINDS'] = {
+    'notifications': database_url('NOTIFICATIONS_DATABASE_URL', 'sqlite:///notifications.db')
+}
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = ENGINE_OPTIONS
 db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+# Schema changes are alembic revisions under migrations/ (flask db migrate / flask db upgrade)
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+migrate = Migrate(app, db, directory=MIGRATIONS_DIR)
+
+# Read-only work (e.g. /login) uses read_session() so it never queues behind writers
+read_sessions = ReadSessions(db, read_url=database_url('DATABASE_READ_URL', None))
+read_session = read_sessions.session
 
 # Extended User model
 class User(db.Model):
@@ -20,12 +50,16 @@ class User(db.Model):
     password = db.Column(db.String(120), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # Role: 'Learner' or 'Mentor'
 
-# Database initialization
+    # Lookups match lower(email) (see userRepo.py), so logins are case-insensitive and still indexed
+    __table_args__ = (db.Index("ix_user_email_lower", db.func.lower(email)),)
+
+# Database initialization: applies pending migrations to every bind and keeps existing data,
+# so workers can be restarted (or rolled) without wiping users or notifications.
+# Workers starting together take turns (a file lock), so only the first one migrates.
 def init_db():
-    with app.app_context():
-        db_path = 'users.db'
-        if os.path.exists(db_path):
-            os.remove(db_path)
-            print("Removed existing database")
-        db.create_all()
-        print("Database initialized successfully")
+    os.makedirs(app.instance_path, exist_ok=True)
+    with open(os.path.join(app.instance_path, 'migrations.lock'), 'w') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        with app.app_context():
+            upgrade()
@@ -0,0 +1,77 @@
+from collections import OrderedDict
+import threading
+import time
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+#--------------------------------------------access tokens------------------------------------------------------#
+#
+# /login issues a signed, expiring token carrying the user's id, email and role.
+# Verifying one is an HMAC check in-process, no database lookup, and decoded claims
+# are kept in a bounded LRU so a client reusing its token skips even that until the
+# token expires. Tokens are stateless: they stay valid until they expire, and every
+# worker must share the same SECRET_KEY to accept each other's tokens.
+#
+#-----------------------------------------------------------------------------------------------------------------#
+
+
+class TokenService:
+    def __init__(self, secret_key, ttl=3600, cache_max_entries=10000, salt="access-token"):
+        self.ttl = ttl
+        self.cache_max_entries = cache_max_entries
+        self._serializer = URLSafeTimedSerializer(secret_key, salt=salt)
+        self._lock = threading.Lock()
+        self._claims = OrderedDict()  # token -> (expires_at, claims)
+        self._stats = {"issued": 0, "verified": 0, "cache_hits": 0, "expired": 0, "invalid": 0}
+
+    def issue(self, user):
+        """Signed token for a User row"""
+        with self._lock:
+            self._stats["issued"] += 1
+        return self._serializer.dumps({"uid": user.id, "email": user.email, "role": user.role})
+
+    def verify(self, token):
+        """Claims dict ({"uid", "email", "role"}) for a valid, unexpired token, else None"""
+        if not token:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._claims.get(token)
+            if entry is not None:
+                if entry[0] > now:
+                    self._claims.move_to_end(token)
+                    self._stats["cache_hits"] += 1
+                    return entry[1]
+                del self._claims[token]
+
+        try:
+            claims, signed_at = self._serializer.loads(token, max_age=self.ttl, return_timestamp=True)
+        except SignatureExpired:
+            with self._lock:
+                self._stats["expired"] += 1
+            return None
+        except BadSignature:
+            with self._lock:
+                self._stats["invalid"] += 1
+            return None
+
+        with self._lock:
+            self._stats["verified"] += 1
+            self._claims[token] = (signed_at.timestamp() + self.ttl, claims)
+            while len(self._claims) > self.cache_max_entries:
+                self._claims.popitem(last=False)
+        return claims
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached"] = len(self._claims)
+        stats["ttl"] = self.ttl
+        return stats
+
+
+def bearer_token(authorization):
+    """Token from an "Authorization: Bearer <token>" header value, or None"""
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer":
+        return None
+    return token.strip() or None
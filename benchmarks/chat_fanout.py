@@ -0,0 +1,153 @@
+"""Multi-process chat fan-out check.
+
+    python benchmarks/chat_fanout.py [--workers 3] [--messages 30]
+
+Starts several app worker processes on consecutive ports, all sharing one chat
+store directory and one SQLite pub/sub file (CHAT_MESSAGE_QUEUE=sqlite:///...).
+A Socket.IO client joins the same group on every worker, messages are sent
+round-robin through all workers, and the script asserts that
+
+  * every client receives every message, whichever worker it was sent through
+  * /get_group_chats returns the same history from every worker
+
+It also reports send -> receive latency across workers. Exits non-zero on failure.
+Needs the python-socketio client extras (pip install "python-socketio[client]").
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import socketio
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+WORKER = """
+import sys
+sys.path.insert(0, {repo!r})
+import run
+run.init_db()
+run.allRoutes.socketio.run(run.app, host="127.0.0.1", port=int(sys.argv[1]), allow_unsafe_werkzeug=True)
+"""
+
+GROUP = "fanout-check"
+
+
+def http(method, url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def wait_until_up(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            http("GET", url + "/get_groups")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"worker at {url} did not start")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--messages", type=int, default=30)
+    parser.add_argument("--base-port", type=int, default=5100)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="chat-fanout-")
+    env = dict(
+        os.environ,
+        DATABASE_URL="sqlite:///" + os.path.join(workdir, "users.db"),
+        NOTIFICATIONS_DATABASE_URL="sqlite:///" + os.path.join(workdir, "notifications.db"),
+        CHAT_STORE_DIR=os.path.join(workdir, "chat_store"),
+        SECRET_KEY="fanout-check",  # shared, so a token from one worker is valid on all
+        CHAT_MESSAGE_QUEUE="sqlite:///" + os.path.join(workdir, "pubsub.db"),
+        AI_CLIENT="fake"
+    )
+    urls = [f"http://127.0.0.1:{args.base_port + i}" for i in range(args.workers)]
+    procs = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER.format(repo=REPO), str(args.base_port + i)],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        for i in range(args.workers)
+    ]
+    clients = []
+    try:
+        for url in urls:
+            wait_until_up(url)
+        http("POST", urls[0] + "/create_group", {"group_name": GROUP, "email": "owner@example.com"})
+
+        received = [dict() for _ in urls]
+        lock = threading.Lock()
+        for i, url in enumerate(urls):
+            client = socketio.Client()
+
+            def on_message(msg, i=i):
+                with lock:
+                    received[i][msg["message"]] = time.perf_counter()
+
+            client.on("receive_message", on_message)
+            client.connect(url)
+            client.emit("join", {"group_name": GROUP, "email": f"user{i}@example.com"})
+            clients.append(client)
+        time.sleep(0.5)  # let the joins land before sending
+
+        sent = {}
+        for n in range(args.messages):
+            text = f"message {n}"
+            sent[text] = time.perf_counter()
+            clients[n % len(clients)].emit("send_message", {
+                "group_name": GROUP, "email": f"user{n % len(clients)}@example.com", "message": text
+            })
+
+        deadline = time.time() + 10
+        while time.time() < deadline and any(len(r) < args.messages for r in received):
+            time.sleep(0.05)
+
+        ok = True
+        for i, got in enumerate(received):
+            missing = set(sent) - set(got)
+            print(f"worker {i}: received {len(got)}/{args.messages}")
+            if missing:
+                ok = False
+
+        histories = [
+            [m["message"] for m in http("GET", f"{url}/get_group_chats?group_name={GROUP}&limit=500")]
+            for url in urls
+        ]
+        consistent = all(h == histories[0] for h in histories) and sorted(histories[0]) == sorted(sent)
+        print(f"history consistent across workers: {consistent}")
+        ok = ok and consistent
+
+        latencies = [(got[text] - sent[text]) * 1000 for got in received for text in got]
+        if latencies:
+            print(f"fan-out latency ms: p50={percentile(latencies, 50):.1f} "
+                  f"p95={percentile(latencies, 95):.1f} max={max(latencies):.1f}")
+        print("PASS" if ok else "FAIL")
+        return 0 if ok else 1
+    finally:
+        for client in clients:
+            client.disconnect()
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
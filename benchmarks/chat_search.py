@@ -0,0 +1,92 @@
+"""Chat search latency as the index grows.
+
+    python benchmarks/chat_search.py [--messages 1000000] [--groups 500] [--queries 200]
+
+Fills a scratch ChatSearchIndex with synthetic messages (a Zipf-ish vocabulary, so
+some words are very common and others rare), indexing in pipeline-sized batches,
+then times group-filtered and all-groups searches for common, rare and prefix
+terms, reporting p50/p95 in milliseconds. Never touches the app's own chat store.
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from chatSearch import ChatSearchIndex  # noqa: E402
+
+VOCABULARY = [f"word{n}" for n in range(20000)]
+CUM_WEIGHTS = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def fill(index, messages, groups, batch=100, rng=random):
+    last_ids = [0] * groups
+    started = time.perf_counter()
+    done = 0
+    while done < messages:
+        group = rng.randrange(groups)
+        count = min(batch, messages - done)
+        rows = []
+        for _ in range(count):
+            last_ids[group] += 1
+            rows.append({
+                "id": last_ids[group],
+                "from": f"user{rng.randrange(1000)}@example.com",
+                "timestamp": "2025-01-01 00:00:00",
+                "message": " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=rng.randint(4, 20)))
+            })
+        index.index_messages(f"group {group}", rows)
+        done += count
+    return time.perf_counter() - started
+
+
+def timed(index, label, queries, groups_for, order="rank"):
+    latencies = []
+    for text in queries:
+        groups = groups_for()
+        started = time.perf_counter()
+        index.search(text, groups=groups, limit=20, order=order)
+        latencies.append((time.perf_counter() - started) * 1000)
+    print(f"{label:<40} p50={percentile(latencies, 50):7.2f}ms  p95={percentile(latencies, 95):7.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=1000000)
+    parser.add_argument("--groups", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    index = ChatSearchIndex(os.path.join(tempfile.mkdtemp(prefix="chat-search-"), "search.db"))
+    elapsed = fill(index, args.messages, args.groups, rng=rng)
+    print(f"indexed {args.messages} messages in {args.groups} groups: {elapsed:.1f}s "
+          f"({args.messages / elapsed:.0f} msg/s)")
+
+    common = [rng.choice(VOCABULARY[:20]) for _ in range(args.queries)]
+    rare = [rng.choice(VOCABULARY[5000:]) for _ in range(args.queries)]
+    prefix = [rng.choice(VOCABULARY[100:1000])[:-1] for _ in range(args.queries)]
+    one_group = lambda: [f"group {rng.randrange(args.groups)}"]  # noqa: E731
+    ten_groups = lambda: [f"group {rng.randrange(args.groups)}" for _ in range(10)]  # noqa: E731
+
+    timed(index, "one group, common word", common, one_group)
+    timed(index, "one group, rare word", rare, one_group)
+    timed(index, "one group, prefix", prefix, one_group)
+    timed(index, "one group, two words", [f"{a} {b}" for a, b in zip(common, rare)], one_group)
+    timed(index, "ten groups (a user's), common word", common, ten_groups)
+    timed(index, "all groups, rare word", rare, lambda: None)
+    timed(index, "all groups, common word", common, lambda: None)
+    timed(index, "all groups, common word, recent first", common, lambda: None, order="recent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Mixed /register + /login concurrency benchmark for the users database.
+
+    python benchmarks/db_concurrency.py [--threads 8] [--ops 300] [--register-ratio 0.2]
+
+Runs the same workload twice, each in a fresh process with its own scratch SQLite
+file (DATABASE_URL), once with the old defaults (rollback journal, synchronous=FULL,
+no mmap) and once with the dbConfig defaults (WAL, synchronous=NORMAL,
+busy_timeout, mmap). Every thread issues --ops requests through the Flask test
+client, registering new users for --register-ratio of them and logging in as an
+existing user otherwise. Reports throughput, latency percentiles and failed requests
+(e.g. "database is locked").
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CONFIGS = [
+    # busy_timeout stays at 5000 ms here: the old setup got the same from sqlite3.connect's default timeout
+    ("rollback journal (old)", {"DB_JOURNAL_MODE": "DELETE", "DB_SYNCHRONOUS": "FULL", "DB_MMAP_SIZE": "0"}),
+    ("WAL + tuned pragmas", {})
+]
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def user(n):
+    return {"name": "Load", "surname": "Test", "email": f"user{n}@example.com", "mobile": "5550000",
+            "password": f"secret{n}", "role": "Learner"}
+
+
+def child(args):
+    """Runs inside the scratch process; prints one JSON result line"""
+    sys.path.insert(0, REPO)
+    from authApp import app, db
+    import allRoutes  # noqa: F401  registers /register and /login
+
+    with app.app_context():
+        db.create_all()
+    seed = 50
+    client = app.test_client()
+    for n in range(seed):
+        client.post("/register", json=user(n))
+
+    counter = [seed]
+    lock = threading.Lock()
+    latencies = []
+    failures = []
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        client = app.test_client()
+        for _ in range(args.ops):
+            if rng.random() < args.register_ratio:
+                with lock:
+                    n = counter[0]
+                    counter[0] += 1
+                started = time.perf_counter()
+                resp = client.post("/register", json=user(n))
+                ok = resp.status_code == 201
+            else:
+                n = rng.randrange(seed)
+                started = time.perf_counter()
+                resp = client.post("/login", json={"email": f"user{n}@example.com", "password": f"secret{n}",
+                                                   "role": "Learner"})
+                ok = resp.status_code == 200
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed * 1000)
+                if not ok:
+                    failures.append(resp.status_code)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+
+    print(json.dumps({
+        "requests": len(latencies),
+        "seconds": wall,
+        "throughput": len(latencies) / wall,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "max_ms": max(latencies),
+        "failures": len(failures)
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=300, help="requests per thread")
+    parser.add_argument("--register-ratio", type=float, default=0.2)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    for label, overrides in CONFIGS:
+        workdir = tempfile.mkdtemp(prefix="db-concurrency-")
+        env = dict(
+            os.environ,
+            DATABASE_URL="sqlite:///" + os.path.join(workdir, "users.db"),
+            NOTIFICATIONS_DATABASE_URL="sqlite:///" + os.path.join(workdir, "notifications.db"),
+            CHAT_STORE_DIR=os.path.join(workdir, "chat_store"),
+            AI_CLIENT="fake",
+            **overrides
+        )
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--threads", str(args.threads),
+             "--ops", str(args.ops), "--register-ratio", str(args.register_ratio)],
+            cwd=workdir, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"{label:<24} {result['requests']} req in {result['seconds']:6.2f}s  "
+              f"{result['throughput']:7.0f} req/s  p50={result['p50_ms']:.1f}ms  "
+              f"p95={result['p95_ms']:.1f}ms  max={result['max_ms']:.1f}ms  failed={result['failures']}")
+
+
+if __name__ == "__main__":
+    main()
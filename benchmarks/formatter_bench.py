@@ -0,0 +1,114 @@
+"""Micro-benchmark: textFormatter vs. the original per-call regex formatter.
+
+    python benchmarks/formatter_bench.py [--iterations N]
+
+Builds representative markdown answers of 10-100 KB (paragraphs with **bold**,
+*italic*, bullet lists and fenced code) and times format_response both ways,
+plus the incremental BlockStream fed in 64-byte chunks. Outputs are checked to
+be identical before anything is timed.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from textFormatter import format_response, iter_blocks  # noqa: E402
+
+
+#-------------------------------------- original implementation --------------------------------------#
+
+def legacy_clean_text(text):
+    text = re.sub(r'\*\*(.*?)\*\*', r'\1', text)
+    text = re.sub(r'\*(.*?)\*', r'\1', text)
+    text = re.sub(r'(\n-|\n•|\n\*)', '\n🔹 ', text)
+    text = text.replace("\n", "\n\n")
+    return text.strip()
+
+
+def legacy_format_response(raw_text):
+    if "```" in raw_text:
+        code_blocks = raw_text.split("```")
+        formatted_blocks = []
+        for i, block in enumerate(code_blocks):
+            block = block.strip()
+            if i % 2 == 1:
+                lines = block.split("\n")
+                language = lines[0] if lines else "plaintext"
+                code_content = "\n".join(lines[1:]) if len(lines) > 1 else ""
+                formatted_blocks.append({"type": "code", "language": language.strip(), "content": code_content.strip()})
+            else:
+                if block:
+                    formatted_blocks.append({"type": "text", "content": legacy_clean_text(block)})
+        return formatted_blocks
+    return [{"type": "text", "content": legacy_clean_text(raw_text)}]
+
+
+#-------------------------------------- synthetic answers --------------------------------------#
+
+WORDS = "the a of to in is that for it as with was on be by this are or from at an which recursion array".split()
+
+
+def sentence(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 16))]
+    i = rng.randrange(len(words))
+    words[i] = rng.choice([f"**{words[i]}**", f"*{words[i]}*", words[i]])
+    return " ".join(words).capitalize() + "."
+
+
+def code(rng):
+    lines = [f"    value_{i} = compute(value_{i - 1}) * {rng.randint(1, 9)}" for i in range(1, rng.randint(5, 30))]
+    return "```python\ndef solve(value_0):\n" + "\n".join(lines) + "\n    return value_0\n```"
+
+
+def make_response(size, seed=0):
+    rng = random.Random(seed)
+    parts = []
+    total = 0
+    while total < size:
+        kind = rng.random()
+        if kind < 0.5:
+            part = " ".join(sentence(rng) for _ in range(rng.randint(2, 6)))
+        elif kind < 0.8:
+            part = "\n".join(f"{rng.choice('-*•')} **Step {i}:** {sentence(rng)}" for i in range(rng.randint(2, 6)))
+        else:
+            part = code(rng)
+        parts.append(part)
+        total += len(part) + 2
+    return "\n\n".join(parts)
+
+
+def bench(fn, arg, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(arg)
+    return (time.perf_counter() - start) / iterations
+
+
+def streamed(text, chunk_size=64):
+    return list(iter_blocks(text[i:i + chunk_size] for i in range(0, len(text), chunk_size)))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'legacy ms':>10} {'new ms':>10} {'speedup':>8} {'stream ms':>10}")
+    for size in (10_000, 25_000, 50_000, 100_000):
+        text = make_response(size, seed=size)
+        expected = legacy_format_response(text)
+        assert format_response(text) == expected, "format_response output differs"
+        assert streamed(text) == expected, "BlockStream output differs"
+
+        legacy = bench(legacy_format_response, text, args.iterations)
+        new = bench(format_response, text, args.iterations)
+        stream = bench(streamed, text, max(args.iterations // 10, 1))
+        print(f"{len(text):>8} {legacy * 1000:>10.3f} {new * 1000:>10.3f} {legacy / new:>7.2f}x {stream * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+"""Offline load test of the HTTP, Socket.IO and AI endpoints.
+
+    python benchmarks/loadtest.py [--users 40] [--groups 8] [--concurrency 8] [--messages 400]
+                                  [--ai-requests 40] [--output loadtest.json]
+
+Serves the app on a local port inside this process. Every store (users and
+notifications databases, chat store, search index) lives in a throwaway
+directory, and the offline FakeModelClient stands in for Gemini, so nothing
+leaves the machine. A seeded generator makes up users, groups and chat messages,
+and each scenario runs them through the real HTTP and Socket.IO stack:
+
+  register, login             POST /register, /login
+  groups                      POST /create_group, /join_group
+  socketio                    clients connected with their access tokens and joined to
+                              their groups; latency is send -> receive, per member
+  history, search             GET /get_group_chats, /search_messages
+  generate, generate_stream   POST /generate, /generate/stream (ttfb = first body chunk)
+
+Each scenario reports throughput, p50/p95/p99 latency and time to first byte. The
+table is printed and the same numbers are written as JSON to --output, so runs can
+be diffed to catch regressions. Exits non-zero if any request or delivery failed.
+Needs the python-socketio client extras (pip install "python-socketio[client]").
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import re
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import socketio
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, REPO)
+
+LAUNCH_DIR = os.getcwd()
+
+# Everything the app writes goes to the work directory (including files it creates relative to the cwd)
+workdir = tempfile.mkdtemp(prefix="loadtest-")
+os.chdir(workdir)
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "users.db")
+os.environ["NOTIFICATIONS_DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "notifications.db")
+os.environ["CHAT_STORE_DIR"] = os.path.join(workdir, "chat_store")
+os.environ.pop("CHAT_SEARCH_DB", None)
+os.environ["AI_CLIENT"] = "fake"
+# One client drives far more traffic than any user would; set these to measure the limiter instead
+os.environ.setdefault("RATE_LIMIT_GENERATE", "0")
+os.environ.setdefault("RATE_LIMIT_CHAT", "0")
+os.environ.setdefault("AI_DAILY_TOKEN_QUOTA", "0")
+
+from authApp import app, init_db  # noqa: E402
+from aiClient import FakeModelClient  # noqa: E402
+import allRoutes  # noqa: E402
+
+logging.disable(logging.INFO)  # the app logs every request at DEBUG/INFO; keep the report readable
+
+HOST = "127.0.0.1"
+
+VOCABULARY = (
+    "python flask socket group chat message course lesson mentor learner quiz answer question "
+    "deadline project review notes lecture video homework exam grade feedback module chapter "
+    "database index cache latency thread worker queue token login register search history"
+).split()
+
+MESSAGE_TAG = re.compile(r"^#(\d+) ")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(int(len(values) * pct / 100), len(values) - 1)]
+
+
+def summarize(values):
+    if not values:
+        return None
+    return {
+        "p50": round(percentile(values, 50) * 1000, 2),
+        "p95": round(percentile(values, 95) * 1000, 2),
+        "p99": round(percentile(values, 99) * 1000, 2),
+        "max": round(max(values) * 1000, 2)
+    }
+
+
+class Recorder:
+    """Latencies, time-to-first-byte and outcomes of one scenario (thread-safe)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.ttfbs = []
+        self.statuses = {}
+        self.errors = 0
+        self.extra = {}
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency, ttfb=None, status=None, ok=True):
+        with self._lock:
+            self.latencies.append(latency)
+            if ttfb is not None:
+                self.ttfbs.append(ttfb)
+            if status is not None:
+                self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+            if not ok:
+                self.errors += 1
+
+    def summary(self):
+        count = len(self.latencies)
+        result = {
+            "requests": count,
+            "errors": self.errors,
+            "seconds": round(self.elapsed, 3),
+            "throughput_per_s": round(count / self.elapsed, 1) if self.elapsed else None,
+            "latency_ms": summarize(self.latencies),
+            "ttfb_ms": summarize(self.ttfbs),
+            "statuses": self.statuses
+        }
+        result.update(self.extra)
+        return result
+
+
+class Client:
+    """Minimal HTTP client: one connection per request, like most mobile clients behind a proxy"""
+
+    def __init__(self, port):
+        self.port = port
+
+    def request(self, method, path, body=None, token=None, stream=False):
+        """(status, body bytes, latency, ttfb); ttfb is the first body chunk when streaming"""
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        conn = http.client.HTTPConnection(HOST, self.port, timeout=120)
+        started = time.perf_counter()
+        try:
+            conn.request(method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+            resp = conn.getresponse()
+            ttfb = time.perf_counter() - started
+            if stream:
+                first = resp.read1(65536)
+                ttfb = time.perf_counter() - started
+                data = first + resp.read()
+            else:
+                data = resp.read()
+            return resp.status, data, time.perf_counter() - started, ttfb
+        finally:
+            conn.close()
+
+
+def run_scenario(name, jobs, concurrency, expect=(200,), recorder=None):
+    """Runs every job (a callable returning (status, latency, ttfb)) on a thread pool"""
+    recorder = recorder or Recorder(name)
+
+    def run(job):
+        try:
+            status, latency, ttfb = job()
+        except Exception as e:
+            recorder.record(0.0, status=type(e).__name__, ok=False)
+            return
+        recorder.record(latency, ttfb, status, ok=status in expect)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(run, jobs))
+    recorder.elapsed += time.perf_counter() - started
+    return recorder
+
+
+def http_job(client, method, path, body=None, token=None, stream=False):
+    def job():
+        status, _, latency, ttfb = client.request(method, path, body, token, stream)
+        return status, latency, ttfb
+    return job
+
+
+#--------------------------------------------synthetic data------------------------------------------------------#
+
+class Workload:
+    """Seeded users, groups, memberships and message texts"""
+
+    def __init__(self, users, groups, members_per_group, seed):
+        self.rng = random.Random(seed)
+        self.users = [
+            {
+                "name": f"User{i}",
+                "surname": f"Load{i}",
+                "email": f"user{i}@loadtest.example",
+                "mobile": f"+1555{i:07d}",
+                "password": f"password-{i}",
+                "role": "Mentor" if i % 5 == 0 else "Learner"
+            }
+            for i in range(users)
+        ]
+        self.groups = [f"loadtest group {i}" for i in range(groups)]
+        self.members = {}
+        for i, group in enumerate(self.groups):
+            owner = self.users[i % users]["email"]
+            others = self.rng.sample([u["email"] for u in self.users if u["email"] != owner],
+                                     min(members_per_group - 1, users - 1))
+            self.members[group] = [owner] + others
+        self.tokens = {}
+
+    def text(self, words=None):
+        return " ".join(self.rng.choices(VOCABULARY, k=words or self.rng.randint(4, 20)))
+
+
+#--------------------------------------------scenarios------------------------------------------------------#
+
+def scenario_register(client, work, args):
+    jobs = [http_job(client, "POST", "/register", user) for user in work.users]
+    return run_scenario("register", jobs, args.concurrency, expect=(201,))
+
+
+def scenario_login(client, work, args):
+    lock = threading.Lock()
+
+    def login(user):
+        def job():
+            status, data, latency, ttfb = client.request(
+                "POST", "/login", {"email": user["email"], "password": user["password"], "role": user["role"]}
+            )
+            if status == 200:
+                with lock:
+                    work.tokens[user["email"]] = json.loads(data)["access_token"]
+            return status, latency, ttfb
+        return job
+
+    # Every user logs in --logins times: the first pays the password KDF, the rest show the cached path
+    jobs = [login(user) for _ in range(args.logins) for user in work.users]
+    return run_scenario("login", jobs, args.concurrency)
+
+
+def scenario_groups(client, work, args):
+    # Creates first (joins need the group), then every join concurrently
+    creates = [
+        http_job(client, "POST", "/create_group", {"group_name": group, "email": members[0]},
+                 token=work.tokens.get(members[0]))
+        for group, members in work.members.items()
+    ]
+    recorder = run_scenario("groups", creates, args.concurrency, expect=(201,))
+    joins = [
+        http_job(client, "POST", "/join_group", {"group_name": group, "email": email}, token=work.tokens.get(email))
+        for group, members in work.members.items() for email in members[1:]
+    ]
+    return run_scenario("groups", joins, args.concurrency, recorder=recorder)
+
+
+def scenario_socketio(client, work, args):
+    """Connects member clients, sends --messages through random members, times every delivery"""
+    recorder = Recorder("socketio")
+    sent = {}
+    delivered = {"count": 0}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    emails = list(work.tokens)[:args.socket_clients]
+    memberships = {email: [g for g, members in work.members.items() if email in members] for email in emails}
+    emails = [email for email in emails if memberships[email]]
+    listeners = {group: sum(group in memberships[email] for email in emails) for group in work.groups}
+
+    def on_message(data):
+        received = time.perf_counter()
+        match = MESSAGE_TAG.match(data.get("message", ""))
+        if not match:
+            return
+        with lock:
+            send_time = sent.get(int(match.group(1)))
+            delivered["count"] += 1
+            if delivered["count"] >= expected:
+                done.set()
+        if send_time is not None:
+            recorder.record(received - send_time)
+
+    clients = {}
+    connect_started = time.perf_counter()
+    for email in emails:
+        sio = socketio.Client(reconnection=False)
+        sio.on("receive_message", on_message)
+        sio.connect(f"http://{HOST}:{client.port}", auth={"token": work.tokens[email]},
+                    transports=["websocket"], wait_timeout=10)
+        for group in memberships[email]:
+            sio.call("join", {"group_name": group}, timeout=10)
+        clients[email] = sio
+    connect_seconds = time.perf_counter() - connect_started
+
+    plan = []
+    for n in range(args.messages):
+        email = work.rng.choice(emails)
+        plan.append((n, email, work.rng.choice(memberships[email]), work.text()))
+    expected = sum(listeners[group] for _, _, group, _ in plan)
+
+    def send(item):
+        n, email, group, text = item
+        with lock:
+            sent[n] = time.perf_counter()
+        clients[email].emit("send_message", {"group_name": group, "message": f"#{n} {text}"})
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(send, plan))
+    send_seconds = time.perf_counter() - started
+    done.wait(args.delivery_timeout)
+    recorder.elapsed = time.perf_counter() - started
+
+    for sio in clients.values():
+        sio.disconnect()
+
+    recorder.errors = expected - delivered["count"]
+    recorder.extra = {
+        "clients": len(clients),
+        "connect_and_join_seconds": round(connect_seconds, 3),
+        "messages_sent": len(plan),
+        "send_rate_per_s": round(len(plan) / send_seconds, 1) if send_seconds else None,
+        "deliveries_expected": expected,
+        "deliveries": delivered["count"]
+    }
+    return recorder
+
+
+def scenario_history(client, work, args):
+    jobs = []
+    for _ in range(args.reads):
+        group = work.rng.choice(work.groups)
+        params = {"group_name": group, "limit": 50}
+        if work.rng.random() < 0.5:
+            params["before"] = work.rng.randint(1, max(args.messages // len(work.groups), 1))
+        jobs.append(http_job(client, "GET", "/get_group_chats?" + urlencode(params)))
+    return run_scenario("history", jobs, args.concurrency)
+
+
+def scenario_search(client, work, args):
+    jobs = []
+    emails = list(work.tokens)
+    for _ in range(args.reads):
+        params = {"q": " ".join(work.rng.sample(VOCABULARY, work.rng.randint(1, 2)))}
+        token = None
+        if work.rng.random() < 0.5:
+            params["group_name"] = work.rng.choice(work.groups)
+        else:
+            token = work.tokens[work.rng.choice(emails)]  # scoped to that user's groups
+        jobs.append(http_job(client, "GET", "/search_messages?" + urlencode(params), token=token))
+    return run_scenario("search", jobs, args.concurrency)
+
+
+def scenario_generate(client, work, args):
+    # Distinct prompts, so every request reaches the (fake) model instead of the response cache
+    jobs = [
+        http_job(client, "POST", "/generate", {"prompt": f"loadtest {n}: {work.text(8)}"})
+        for n in range(args.ai_requests)
+    ]
+    return run_scenario("generate", jobs, args.concurrency)
+
+
+def scenario_generate_stream(client, work, args):
+    jobs = [
+        http_job(client, "POST", "/generate/stream?format=ndjson", {"prompt": f"loadtest stream {n}: {work.text(8)}"},
+                 stream=True)
+        for n in range(args.ai_requests)
+    ]
+    return run_scenario("generate_stream", jobs, args.concurrency)
+
+
+SCENARIOS = [
+    ("register", scenario_register),
+    ("login", scenario_login),
+    ("groups", scenario_groups),
+    ("socketio", scenario_socketio),
+    ("history", scenario_history),
+    ("search", scenario_search),
+    ("generate", scenario_generate),
+    ("generate_stream", scenario_generate_stream)
+]
+
+
+#--------------------------------------------runner------------------------------------------------------#
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def start_server(port):
+    thread = threading.Thread(
+        target=allRoutes.socketio.run, args=(app,),
+        kwargs={"host": HOST, "port": port, "allow_unsafe_werkzeug": True, "log_output": False},
+        daemon=True
+    )
+    thread.start()
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        try:
+            socket.create_connection((HOST, port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError("server did not start")
+
+
+def print_table(results):
+    """One row per scenario; for socketio the rows counted are deliveries"""
+    columns = [("latency_ms", "p50"), ("latency_ms", "p95"), ("latency_ms", "p99"), ("ttfb_ms", "p50"), ("ttfb_ms", "p95")]
+    print(f"\n{'scenario':<16} {'reqs':>6} {'errs':>5} {'per s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'ttfb p50':>9} {'ttfb p95':>9}")
+    for name, result in results.items():
+        cells = [f"{result[key][pct]:>9.2f}" if result[key] else f"{'-':>9}" for key, pct in columns]
+        print(f"{name:<16} {result['requests']:>6} {result['errors']:>5} {result['throughput_per_s'] or 0:>9.1f} "
+              + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=40)
+    parser.add_argument("--groups", type=int, default=8)
+    parser.add_argument("--members-per-group", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=3, help="logins per user")
+    parser.add_argument("--socket-clients", type=int, default=20)
+    parser.add_argument("--messages", type=int, default=400)
+    parser.add_argument("--delivery-timeout", type=float, default=30)
+    parser.add_argument("--reads", type=int, default=200, help="requests per history/search scenario")
+    parser.add_argument("--ai-requests", type=int, default=40)
+    parser.add_argument("--ai-first-chunk-ms", type=float, default=50, help="fake model time to first token")
+    parser.add_argument("--ai-chunk-ms", type=float, default=5, help="fake model gap between chunks")
+    parser.add_argument("--scenarios", default=",".join(name for name, _ in SCENARIOS),
+                        help="comma-separated subset; later scenarios use the data earlier ones create")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default=os.path.join(LAUNCH_DIR, "loadtest.json"))
+    args = parser.parse_args()
+
+    init_db()
+    app.config["AI_CLIENT"] = FakeModelClient(first_chunk_delay=args.ai_first_chunk_ms / 1000,
+                                              chunk_delay=args.ai_chunk_ms / 1000)
+    port = free_port()
+    start_server(port)
+    client = Client(port)
+    work = Workload(args.users, args.groups, args.members_per_group, args.seed)
+
+    selected = set(args.scenarios.split(","))
+    results = {}
+    for name, scenario in SCENARIOS:
+        if name in selected:
+            print(f"running {name}...", flush=True)
+            results[name] = scenario(client, work, args).summary()
+    print_table(results)
+
+    report = {
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "scenarios": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nwrote {args.output} (work directory {workdir})")
+
+    failed = sum(result["errors"] for result in results.values())
+    if failed:
+        print(f"FAILED: {failed} errors")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
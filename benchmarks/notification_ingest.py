@@ -0,0 +1,72 @@
+"""Notification ingest throughput: one POST per row vs. array-body bulk POSTs.
+
+    python benchmarks/notification_ingest.py [--rows 2000] [--batch 1000]
+
+Runs against throwaway SQLite files (NOTIFICATIONS_DATABASE_URL, DATABASE_URL), never
+the app's own databases, and reports rows/second for both paths.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+workdir = tempfile.mkdtemp(prefix="notification-ingest-")
+os.environ["NOTIFICATIONS_DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "notifications.db")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "users.db")  # init_db() migrates every bind
+
+from authApp import app, init_db  # noqa: E402
+from notifications import notifications_bp, db, Notification  # noqa: E402
+
+app.register_blueprint(notifications_bp)
+
+
+def item(n):
+    return {"title": f"Announcement {n}", "message": f"Course update number {n}", "type": "course"}
+
+
+def single(client, rows):
+    for n in range(rows):
+        resp = client.post("/notifications", json=item(n))
+        assert resp.status_code == 201, resp.get_json()
+
+
+def bulk(client, rows, batch):
+    for start in range(0, rows, batch):
+        resp = client.post("/notifications", json=[item(n) for n in range(start, min(start + batch, rows))])
+        assert resp.status_code == 201, resp.get_json()
+
+
+def timed(label, fn, rows):
+    with app.app_context():
+        db.session.query(Notification).delete()
+        db.session.commit()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    with app.app_context():
+        assert db.session.query(Notification).count() == rows
+    print(f"{label:<28} {rows} rows in {elapsed:7.3f}s  {rows / elapsed:10.0f} rows/s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    init_db()
+    client = app.test_client()
+    single_s = timed("single POST per row", lambda: single(client, args.rows), args.rows)
+    bulk_s = timed(f"bulk POST ({args.batch} per request)", lambda: bulk(client, args.rows, args.batch), args.rows)
+    print(f"speedup: {single_s / bulk_s:.1f}x")
+
+    resp = client.post("/notifications", json=[item(0), {"title": "no message"}, "not an object"])
+    print(f"partial batch -> {resp.status_code} {resp.get_json()['errors']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Encoding cost and wire size of chat history payloads.
+
+    python benchmarks/serialization.py [--sizes 1000,10000,100000] [--repeat 5]
+
+For a synthetic history of each size (the list of message dicts that
+/get_group_chats and the chat store handle), reports the best-of --repeat time to
+
+  stdlib      json.dumps as Flask's default provider configures it (sorted keys,
+              ASCII-escaped), the encoder jsonify() used before FastJSONProvider
+  dumps       serialization.dumps (orjson when installed, else compact stdlib)
+  msgpack     serialization.packb, the opt-in binary Socket.IO batches
+  loads       serialization.loads of the dumps output (chat store reads)
+
+and the size of the dumps output raw, gzipped and (with brotli installed) brotli'd,
+with the time each compression takes at the levels enable_compression() uses.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import serialization  # noqa: E402
+
+WORDS = ("the lesson on derivatives was great can someone share the notes from today "
+         "quiz tomorrow at nine do not forget homework chapter four example problem").split()
+
+
+def history(count, rng):
+    return [{
+        "id": n + 1,
+        "from": f"student{rng.randrange(500)}@example.com",
+        "timestamp": f"2025-01-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00",
+        "message": " ".join(rng.choices(WORDS, k=rng.randint(3, 30))) + rng.choice(["", "", " 👍", " — ok"])
+    } for n in range(count)]
+
+
+def best(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - started)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if serialization.orjson else 'no'}  brotli: {'yes' if serialization.brotli else 'no'}  "
+          f"msgpack: {'yes' if serialization.msgpack else 'no'}")
+    rng = random.Random(42)
+    for size in (int(s) for s in args.sizes.split(",")):
+        messages = history(size, rng)
+        stdlib_s, stdlib = best(lambda: json.dumps(messages, sort_keys=True, ensure_ascii=True).encode(), args.repeat)
+        dumps_s, raw = best(lambda: serialization.dumps(messages), args.repeat)
+        loads_s, _ = best(lambda: serialization.loads(raw), args.repeat)
+        print(f"\n{size} messages")
+        print(f"  encode  stdlib {stdlib_s * 1000:8.2f}ms  {len(stdlib):>10} B")
+        print(f"          dumps  {dumps_s * 1000:8.2f}ms  {len(raw):>10} B  ({stdlib_s / dumps_s:.1f}x)")
+        if serialization.msgpack is not None:
+            pack_s, packed = best(lambda: serialization.packb(messages), args.repeat)
+            print(f"          msgpack{pack_s * 1000:8.2f}ms  {len(packed):>10} B")
+        print(f"  decode  loads  {loads_s * 1000:8.2f}ms")
+
+        encodings = ["gzip"] + (["br"] if serialization.brotli is not None else [])
+        for encoding in encodings:
+            compress_s, compressed = best(lambda: serialization.compress(raw, encoding), args.repeat)
+            print(f"  {encoding:<6}         {compress_s * 1000:8.2f}ms  {len(compressed):>10} B  "
+                  f"({len(compressed) / len(raw):.0%} of raw)")
+
+
+if __name__ == "__main__":
+    main()
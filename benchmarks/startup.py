@@ -0,0 +1,164 @@
+"""Worker cold-start time: import, schema init and ready-to-serve latency.
+
+    python benchmarks/startup.py [--runs 3] [--output startup.json]
+
+Each run starts a fresh worker process against one throwaway data directory and
+times, inside the worker,
+
+  import_s    import run (the app, every route module and their dependencies)
+  init_db_s   authApp.init_db(): pending schema migrations, existing data kept
+
+and, from outside, ready_s: process start until the first HTTP request succeeds.
+The first run starts on an empty directory; later runs restart over the data the
+previous ones left, and the script asserts that a user registered in the first
+run can still log in (restarts must not wipe anything).
+
+It also reports what the first /generate call costs on top of that (importing
+google.generativeai, which is deferred until then) and, with --importtime, the
+slowest modules from python -X importtime.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+REPO = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+WORKER = """
+import sys, time, json
+started = time.perf_counter()
+sys.path.insert(0, {repo!r})
+import run
+imported = time.perf_counter()
+run.init_db()
+initialized = time.perf_counter()
+print(json.dumps({{"import_s": imported - started, "init_db_s": initialized - imported}}), flush=True)
+run.allRoutes.socketio.run(run.app, host="127.0.0.1", port=int(sys.argv[1]), allow_unsafe_werkzeug=True,
+                           log_output=False)
+"""
+
+USER = {"name": "Start", "surname": "Up", "email": "startup@benchmark.example", "mobile": "+15550000000",
+        "password": "startup-password", "role": "Learner"}
+
+
+def post(url, body):
+    request = urllib.request.Request(url, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def worker_env(workdir):
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": "sqlite:///" + os.path.join(workdir, "users.db"),
+        "NOTIFICATIONS_DATABASE_URL": "sqlite:///" + os.path.join(workdir, "notifications.db"),
+        "CHAT_STORE_DIR": os.path.join(workdir, "chat_store"),
+        "SECRET_KEY": "startup-benchmark"
+    })
+    env.pop("CHAT_SEARCH_DB", None)
+    env.pop("AI_CLIENT", None)
+    return env
+
+
+def start_worker(workdir, port):
+    """Starts a worker; returns (process, timings) once it answers HTTP"""
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-c", WORKER.format(repo=REPO), str(port)],
+        cwd=workdir, env=worker_env(workdir), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    timings = json.loads(proc.stdout.readline())
+    deadline = time.time() + 60
+    while True:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/get_groups", timeout=1):
+                break
+        except OSError:
+            if time.time() > deadline or proc.poll() is not None:
+                proc.kill()
+                raise RuntimeError("worker did not become ready")
+            time.sleep(0.01)
+    timings["ready_s"] = time.perf_counter() - started
+    return proc, timings
+
+
+def import_seconds(module, workdir):
+    """Wall time of importing one module in a fresh interpreter"""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=workdir, env=dict(worker_env(workdir), PYTHONPATH=REPO),
+                         capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(workdir, top):
+    """Modules imported by run (up to two levels down) with the largest cumulative python -X importtime"""
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import run"], cwd=workdir,
+                         env=dict(worker_env(workdir), PYTHONPATH=REPO), capture_output=True, text=True)
+    rows = []
+    for line in out.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "cumulative" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            name = name[1:].rstrip()
+            depth = (len(name) - len(name.lstrip())) // 2
+            if 1 <= depth <= 2:
+                rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=5099)
+    parser.add_argument("--importtime", type=int, default=0, metavar="N", help="show the N slowest top-level imports")
+    parser.add_argument("--output", default="startup.json")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="startup-")
+    runs = []
+    for n in range(args.runs):
+        proc, timings = start_worker(workdir, args.port)
+        try:
+            if n == 0:
+                status, body = post(f"http://127.0.0.1:{args.port}/register", USER)
+                assert status == 201, body
+            else:
+                status, body = post(f"http://127.0.0.1:{args.port}/login",
+                                    {"email": USER["email"], "password": USER["password"], "role": USER["role"]})
+                assert status == 200, f"data did not survive the restart: {status} {body}"
+        finally:
+            proc.terminate()
+            proc.wait()
+        timings = {key: round(value, 3) for key, value in timings.items()}
+        print(f"run {n + 1} ({'empty' if n == 0 else 'existing data'}): import {timings['import_s']:.3f}s  "
+              f"init_db {timings['init_db_s']:.3f}s  ready {timings['ready_s']:.3f}s")
+        runs.append(timings)
+
+    genai_s = import_seconds("google.generativeai", workdir)
+    print(f"deferred to the first /generate: import google.generativeai {genai_s:.3f}s")
+
+    report = {
+        "runs": runs,
+        "median": {key: round(statistics.median(run[key] for run in runs), 3) for key in runs[0]},
+        "deferred_genai_import_s": round(genai_s, 3)
+    }
+    if args.importtime:
+        report["slowest_imports"] = [{"module": name, "seconds": round(s, 3)}
+                                     for s, name in slowest_imports(workdir, args.importtime)]
+        for row in report["slowest_imports"]:
+            print(f"  {row['seconds']:.3f}s  {row['module']}")
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"median: {report['median']}  (wrote {args.output})")
+
+
+if __name__ == "__main__":
+    main()
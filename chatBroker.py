@@ -0,0 +1,106 @@
+import base64
+import os
+import threading
+import time
+import socketio
+from dbConfig import connect_sqlite
+
+#--------------------------------------------chat pub/sub backends------------------------------------------------------#
+#
+# Room membership and broadcasts live in the Socket.IO client manager. With the
+# default in-process manager, emit(..., room=group) only reaches clients of the
+# same worker; a pub/sub manager relays every emit to all workers.
+#
+# CHAT_MESSAGE_QUEUE selects the backend:
+#   (unset)                in-process, single worker
+#   sqlite:///<path>       SQLitePubSubManager below: any number of workers on one host, no extra services
+#   redis://..., amqp://.. handed to Flask-SocketIO's own message_queue support, for multi-node setups
+#
+# Every worker must share one SECRET_KEY so access tokens verify everywhere; authApp refuses to
+# start with CHAT_MESSAGE_QUEUE set and no SECRET_KEY.
+#
+#-----------------------------------------------------------------------------------------------------------------------#
+
+SQLITE_PREFIX = "sqlite:///"
+BYTES_KEY = "__bytes__"
+
+
+def _encode_bytes(value):
+    """JSON stand-in for binary payloads (e.g. MessagePack batches)"""
+    if isinstance(value, (bytes, bytearray)):
+        return {BYTES_KEY: base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _decode_bytes(obj):
+    if len(obj) == 1 and BYTES_KEY in obj:
+        return base64.b64decode(obj[BYTES_KEY])
+    return obj
+
+
+class SQLitePubSubManager(socketio.PubSubManager):
+    """Socket.IO pub/sub over a shared SQLite file (WAL), polled by each worker"""
+
+    name = "sqlite"
+
+    def __init__(self, url, channel="socketio", write_only=False, logger=None, poll_interval=0.02, retention=60):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = url[len(SQLITE_PREFIX):] if url.startswith(SQLITE_PREFIX) else url
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._publisher = None
+        self._publish_lock = threading.Lock()
+
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS pubsub ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, "
+                "payload TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_pubsub_created_at ON pubsub (created_at)")
+
+    def _connect(self):
+        # One long-lived connection for publishing and one per listener, so no pool here
+        return connect_sqlite(self.path, check_same_thread=False)
+
+    def _publish(self, data):
+        payload = self.json.dumps(data, default=_encode_bytes)
+        with self._publish_lock:
+            if self._publisher is None:
+                self._publisher = self._connect()
+            with self._publisher as conn:
+                conn.execute(
+                    "INSERT INTO pubsub (channel, payload, created_at) VALUES (?, ?, ?)",
+                    (self.channel, payload, time.time())
+                )
+
+    def _listen(self):
+        conn = self._connect()
+        last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM pubsub").fetchone()[0]
+        last_prune = time.time()
+        while True:
+            rows = conn.execute(
+                "SELECT id, payload FROM pubsub WHERE id > ? AND channel = ? ORDER BY id",
+                (last_id, self.channel)
+            ).fetchall()
+            for row_id, payload in rows:
+                last_id = row_id
+                yield self.json.loads(payload, object_hook=_decode_bytes)
+            if not rows:
+                self.server.sleep(self.poll_interval)
+
+            if time.time() - last_prune > self.retention:
+                last_prune = time.time()
+                with conn:
+                    conn.execute("DELETE FROM pubsub WHERE created_at < ?", (last_prune - self.retention,))
+
+
+def socketio_options():
+    """Extra SocketIO(...) keyword arguments for the configured CHAT_MESSAGE_QUEUE"""
+    url = os.environ.get("CHAT_MESSAGE_QUEUE")
+    channel = os.environ.get("CHAT_MESSAGE_CHANNEL", "flask-socketio")
+    if not url:
+        return {}
+    if url.startswith(SQLITE_PREFIX):
+        return {"client_manager": SQLitePubSubManager(url, channel=channel)}
+    return {"message_queue": url, "channel": channel}
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+
+#--------------------------------------------chat outbound pipeline------------------------------------------------------#
+#
+# send_message handlers only enqueue. A background flusher drains each room's queue
+# every flush_interval seconds (or as soon as a room reaches max_batch messages),
+# persists the whole batch with one store write, and hands it to the broadcaster,
+# which can deliver it as a single event. flush_interval=0 persists and broadcasts
+# inline, one message at a time.
+#
+# Messages still queued when the process dies are lost, so keep the interval small.
+#
+#-------------------------------------------------------------------------------------------------------------------------#
+
+logger = logging.getLogger(__name__)
+
+
+class ChatPipeline:
+    def __init__(self, store, broadcast, flush_interval=0.02, max_batch=100, start_task=None, sleep=time.sleep):
+        """broadcast(group_name, messages) is called after each batch is persisted"""
+        self.store = store
+        self.broadcast = broadcast
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._start_task = start_task or (lambda fn: threading.Thread(target=fn, daemon=True).start())
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = {}  # group -> [(enqueued_at, message)]
+        self._started = False
+        self._stats = {
+            "enqueued": 0,
+            "flushed_messages": 0,
+            "batches": 0,
+            "max_queue_length": 0,
+            "flush_ms_total": 0.0,
+            "flush_ms_max": 0.0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0
+        }
+
+    def submit(self, group_name, msg):
+        if not self.flush_interval:
+            self._flush_batch(group_name, [(time.perf_counter(), msg)])
+            return
+
+        with self._lock:
+            if not self._started:
+                self._started = True
+                self._start_task(self._run)
+            queue = self._pending.setdefault(group_name, [])
+            queue.append((time.perf_counter(), msg))
+            self._stats["enqueued"] += 1
+            self._stats["max_queue_length"] = max(self._stats["max_queue_length"], len(queue))
+            full = len(queue) >= self.max_batch
+        if full:
+            self.flush(group_name)
+
+    def flush(self, group_name):
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending.pop(group_name, None)
+            if batch:
+                self._flush_batch(group_name, batch)
+
+    def flush_all(self):
+        with self._lock:
+            groups = list(self._pending)
+        for group_name in groups:
+            self.flush(group_name)
+
+    def _run(self):
+        while True:
+            self._sleep(self.flush_interval)
+            try:
+                self.flush_all()
+            except Exception:
+                # keep the flusher alive; the failed batch is dropped like a failed inline write would be
+                logger.exception("Chat pipeline flush failed")
+
+    def _flush_batch(self, group_name, batch):
+        started = time.perf_counter()
+        messages = [msg for _, msg in batch]
+        first_id = self.store.append_messages(group_name, messages)
+        flushed = time.perf_counter()
+        self.broadcast(group_name, [dict(msg, id=first_id + i) for i, msg in enumerate(messages)])
+
+        flush_ms = (flushed - started) * 1000
+        wait_ms = max((flushed - enqueued_at) * 1000 for enqueued_at, _ in batch)
+        with self._lock:
+            stats = self._stats
+            stats["flushed_messages"] += len(batch)
+            stats["batches"] += 1
+            stats["flush_ms_total"] += flush_ms
+            stats["flush_ms_max"] = max(stats["flush_ms_max"], flush_ms)
+            stats["wait_ms_total"] += wait_ms
+            stats["wait_ms_max"] = max(stats["wait_ms_max"], wait_ms)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = sum(len(queue) for queue in self._pending.values())
+            stats["queued_rooms"] = len(self._pending)
+        batches = stats["batches"]
+        flush_ms_total = stats.pop("flush_ms_total")
+        wait_ms_total = stats.pop("wait_ms_total")
+        stats["flush_ms_avg"] = round(flush_ms_total / batches, 3) if batches else 0.0
+        stats["wait_ms_avg"] = round(wait_ms_total / batches, 3) if batches else 0.0
+        stats["avg_batch_size"] = round(stats["flushed_messages"] / batches, 2) if batches else 0.0
+        stats["flush_interval_ms"] = self.flush_interval * 1000
+        stats["max_batch"] = self.max_batch
+        return stats
@@ -0,0 +1,203 @@
+import hashlib
+from html import escape
+import re
+import threading
+import unicodedata
+from dbConfig import SQLitePool
+
+#--------------------------------------------chat search index------------------------------------------------------#
+#
+# Full-text index of chat messages in SQLite FTS5, kept next to the chat store.
+#
+#   chat_messages       one row per indexed message, unique on (grp, seq); seq is the message id
+#   chat_messages_fts   external-content FTS5 table over chat_messages, maintained by triggers
+#
+# Each message is indexed twice:
+#   body    the text as written, for searches across all groups
+#   gbody   every word prefixed with its group's key ("g3fa9...newton"), so a group
+#           has its own posting list per word. A search inside one group (or a
+#           user's few groups) only ever reads that group's postings, which keeps it
+#           in the low milliseconds however many messages the other groups hold,
+#           and bm25 statistics become per group as a side effect.
+#
+# Ranked searches across all groups must score every match, so for very common words
+# prefer order="recent" there (FTS5 walks rowids newest first and stops at the limit).
+# /search_messages never runs them: it always scopes to one group or the caller's groups.
+#
+# New messages are indexed in batches as the chat pipeline persists them; catch_up()
+# indexes whatever the store holds beyond the index (first start, or after a crash).
+#
+#-------------------------------------------------------------------------------------------------------------------#
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS chat_messages ("
+    "id INTEGER PRIMARY KEY, grp TEXT NOT NULL, seq INTEGER NOT NULL, sender TEXT, timestamp TEXT, "
+    "body TEXT NOT NULL, gbody TEXT NOT NULL, UNIQUE (grp, seq))",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5("
+    "body, gbody, content='chat_messages', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_ai AFTER INSERT ON chat_messages BEGIN "
+    "INSERT INTO chat_messages_fts (rowid, body, gbody) VALUES (new.id, new.body, new.gbody); END",
+    "CREATE TRIGGER IF NOT EXISTS chat_messages_ad AFTER DELETE ON chat_messages BEGIN "
+    "INSERT INTO chat_messages_fts (chat_messages_fts, rowid, body, gbody) "
+    "VALUES ('delete', old.id, old.body, old.gbody); END"
+]
+
+# The same token boundaries as FTS5's unicode61 tokenizer: runs of letters and digits
+TERM_PATTERN = re.compile(r"[^\W_]+")
+SNIPPET_WORDS = 12
+
+
+def group_key(group_name):
+    """Prefix that scopes a word to one group inside the index"""
+    return "g" + hashlib.sha1(group_name.encode("utf-8")).hexdigest()[:16]
+
+
+def _fold(word):
+    """Lowercase and strip diacritics, like unicode61 remove_diacritics"""
+    decomposed = unicodedata.normalize("NFKD", word.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _group_body(key, body):
+    return " ".join(key + _fold(word) for word in TERM_PATTERN.findall(body))
+
+
+def _match_terms(terms, prefix=""):
+    """Every term must appear, the last one as a prefix (the user may still be typing it)"""
+    quoted = [f'"{prefix}{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _snippet(body, terms, highlight):
+    """A window of the message around its first matching word, matches wrapped in highlight.
+
+    The message text is HTML-escaped, so only the highlight markup is live HTML.
+    """
+    words = list(TERM_PATTERN.finditer(body))
+    last = len(terms) - 1
+
+    def matches(word):
+        folded = _fold(word)
+        return any(folded == term or (i == last and folded.startswith(term)) for i, term in enumerate(terms))
+
+    hits = [i for i, word in enumerate(words) if matches(word.group())]
+    if not hits:
+        return escape(body if len(words) <= SNIPPET_WORDS else body[:words[SNIPPET_WORDS].start()].rstrip() + "…")
+
+    first = max(min(hits[0] - SNIPPET_WORDS // 3, len(words) - SNIPPET_WORDS), 0)
+    window = words[first:first + SNIPPET_WORDS]
+    start = window[0].start() if first else 0
+    end = window[-1].end() if first + SNIPPET_WORDS < len(words) else len(body)
+
+    parts = ["…" if first else ""]
+    position = start
+    for i in hits:
+        if first <= i < first + SNIPPET_WORDS:
+            word = words[i]
+            parts.append(escape(body[position:word.start()]))
+            parts.append(highlight[0] + escape(word.group()) + highlight[1])
+            position = word.end()
+    parts.append(escape(body[position:end]))
+    if end < len(body):
+        parts.append("…")
+    return "".join(parts)
+
+
+class ChatSearchIndex:
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._pool = SQLitePool(db_path)
+        self._write_lock = threading.Lock()
+        with self._pool.connection() as conn, conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    # ---------------------------------------------- writes ---------------------------------------------- #
+
+    def index_messages(self, group_name, messages):
+        """Indexes persisted messages (each with its "id"); already indexed ones are skipped"""
+        key = group_key(group_name)
+        rows = []
+        for msg in messages:
+            body = msg.get("message") or ""
+            rows.append((group_name, msg["id"], msg.get("from"), msg.get("timestamp"), body, _group_body(key, body)))
+        if not rows:
+            return
+        with self._write_lock, self._pool.connection() as conn, conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO chat_messages (grp, seq, sender, timestamp, body, gbody) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def remove_messages(self, group_name, message_ids):
+        with self._write_lock, self._pool.connection() as conn, conn:
+            conn.executemany(
+                "DELETE FROM chat_messages WHERE grp = ? AND seq = ?", [(group_name, i) for i in message_ids]
+            )
+
+    def clear(self):
+        with self._write_lock, self._pool.connection() as conn, conn:
+            conn.execute("DELETE FROM chat_messages")
+
+    def catch_up(self, store, batch_size=1000):
+        """Indexes every message the store holds past the highest indexed id of its group"""
+        for group in store.list_groups():
+            name = group["name"]
+            with self._pool.connection() as conn:
+                after = conn.execute(
+                    "SELECT COALESCE(MAX(seq), 0) FROM chat_messages WHERE grp = ?", (name,)
+                ).fetchone()[0]
+            while True:
+                messages = store.read_messages(name, after=after, limit=batch_size)["messages"]
+                if not messages:
+                    break
+                self.index_messages(name, messages)
+                after = messages[-1]["id"]
+
+    # ---------------------------------------------- queries ---------------------------------------------- #
+
+    def search(self, text, groups=None, limit=20, offset=0, order="rank", highlight=("<mark>", "</mark>")):
+        """Returns (hits, has_more): matching messages with a highlighted, HTML-escaped snippet each.
+
+        groups limits the search to those group names (None searches all of them);
+        order is "rank" (bm25, best first) or "recent" (newest first).
+        """
+        terms = [_fold(term) for term in TERM_PATTERN.findall(text)]
+        if not terms or groups == []:
+            return [], False
+        if groups is None:
+            match = f"body:({_match_terms(terms)})"
+        else:
+            match = "gbody:(" + " OR ".join(f"({_match_terms(terms, group_key(name))})" for name in groups) + ")"
+
+        # Page inside the FTS query itself so only the returned rows are joined to their content
+        with self._pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT m.grp, m.seq, m.sender, m.timestamp, m.body, f.rank FROM ("
+                + ("SELECT rowid, 0.0 AS rank " if order == "recent" else "SELECT rowid, rank ")
+                + "FROM chat_messages_fts WHERE chat_messages_fts MATCH ? "
+                + ("ORDER BY rowid DESC " if order == "recent" else "ORDER BY rank ")
+                + "LIMIT ? OFFSET ?) f JOIN chat_messages m ON m.id = f.rowid "
+                + ("ORDER BY f.rowid DESC" if order == "recent" else "ORDER BY f.rank"),
+                (match, limit + 1, offset)
+            ).fetchall()
+
+        hits = [
+            {
+                "group_name": grp,
+                "id": message_id,
+                "from": sender,
+                "timestamp": timestamp,
+                "message": body,
+                "snippet": _snippet(body, terms, highlight),
+                "score": round(-score, 4)
+            }
+            for grp, message_id, sender, timestamp, body, score in rows[:limit]
+        ]
+        return hits, len(rows) > limit
+
+    def stats(self):
+        with self._pool.connection() as conn:
+            return {"indexed_messages": conn.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0]}
@@ -0,0 +1,557 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import threading
+from serialization import dumps, loads
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; single-process only there
+    fcntl = None
+
+#--------------------------------------------chat storage engine------------------------------------------------------#
+#
+# Layout on disk (everything is newline-delimited JSON, one record per line):
+#
+#   <root>/groups.log              group/member events: {"op": "create"|"join", "group": ..., "email": ...}
+#   <root>/messages/<sha1>.log     one append-only message log per group
+#   <root>/messages/<sha1>.del     ids of deleted messages in that group (tombstones), one per line
+#   <root>/.lock                   flock()ed by whichever process is writing
+#
+# Group metadata is small and kept fully in memory; message logs are only read
+# for the group that is asked for, so one group's history never costs another.
+# Members are kept as an insertion-ordered set (a dict) per group, with a reverse
+# email -> group names index, so membership checks and "my groups" are O(1)/O(k).
+# Each group's log also gets a lazily built index (byte offset and id of every
+# message line), so any page of history is a single seek + bounded read and an id
+# is found by bisecting the ids, which only ever increase along the log.
+#
+# Several worker processes may share one store directory. Writes are serialized
+# with the lock file, and every process catches its in-memory index up with
+# records appended by others (an fstat() per call, reading only the new bytes).
+# Rewrites (compaction, reset) go through os.replace, so a changed inode tells
+# other processes to reload from scratch. Readers open a file once and index and
+# read through that one descriptor, so a rewrite landing in between can't make
+# them seek old offsets in the new file.
+#
+# Messages are addressed by a per-group id assigned when they are appended: the
+# group's last id + 1, written as the first key of the record. Lines written before
+# ids existed are numbered by their position, which is the same thing. A delete only
+# appends the id to the group's .del file; readers skip tombstoned ids, and
+# compact_messages() later rewrites the log without them. The newest record is kept
+# (still tombstoned) so ids are never handed out twice.
+#
+#---------------------------------------------------------------------------------------------------------------------#
+
+GROUPS_LOG = "groups.log"
+MESSAGES_DIR = "messages"
+LOCK_FILE = ".lock"
+
+# Rewrite groups.log once it holds this many more records than live facts
+COMPACT_SLACK = 1000
+
+# compact_deleted() rewrites a message log once this many (or this share) of its records are tombstoned
+MESSAGE_COMPACT_MIN = 256
+MESSAGE_COMPACT_RATIO = 0.1
+
+ID_PREFIX = b'{"id":'
+
+
+def _encode(record):
+    return dumps(record) + b"\n"
+
+
+def _encode_message(message_id, msg):
+    """Message record with its id as the first key, so the index can read it without parsing JSON"""
+    body = dumps({k: v for k, v in msg.items() if k != "id"})
+    return ID_PREFIX + str(message_id).encode("ascii") + (b"," if body != b"{}" else b"") + body[1:] + b"\n"
+
+
+def _line_id(line, previous):
+    if line.startswith(ID_PREFIX):
+        end = line.find(b",", len(ID_PREFIX))
+        return int(line[len(ID_PREFIX):end if end != -1 else line.rfind(b"}")])
+    return previous + 1  # written before ids existed: numbered by position
+
+
+def _stat(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _open_for_read(path):
+    """The file opened for binary reads, None when it doesn't exist"""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        yield None
+        return
+    with f:
+        yield f
+
+
+def _write_atomic(path, records):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for record in records:
+            f.write(_encode(record))
+    os.replace(tmp_path, path)
+
+
+class _LogIndex:
+    """What we know about one group's message log"""
+    __slots__ = ("inode", "offsets", "ids", "deleted", "del_inode", "del_position")
+
+    def __init__(self, inode):
+        self.inode = inode
+        self.offsets = array("Q", [0])  # start of every message line, plus the end offset
+        self.ids = array("Q")           # id of every message line, ascending
+        self.deleted = set()            # tombstoned ids
+        self.del_inode = None
+        self.del_position = 0
+
+    def position(self, message_id):
+        i = bisect_left(self.ids, message_id)
+        return i if i < len(self.ids) and self.ids[i] == message_id else None
+
+    def live_before(self, position):
+        while position > 0:
+            position -= 1
+            if self.ids[position] not in self.deleted:
+                return True
+        return False
+
+    def live_from(self, position):
+        for i in range(position, len(self.ids)):
+            if self.ids[i] not in self.deleted:
+                return True
+        return False
+
+
+class ChatStore:
+    """Append-only group chat store with an in-memory group/member index"""
+
+    def __init__(self, root, legacy_file=None):
+        self.root = root
+        self.messages_dir = os.path.join(root, MESSAGES_DIR)
+        self.groups_log = os.path.join(root, GROUPS_LOG)
+        self._lock = threading.RLock()
+        self._lock_depth = 0
+        self._groups = {}
+        self._groups_by_member = {}  # email -> set of group names
+        self._groups_inode = None
+        self._groups_position = 0
+        self._log_records = 0
+        self._indexes = {}  # group -> _LogIndex
+
+        os.makedirs(self.messages_dir, exist_ok=True)
+        self._lock_file = open(os.path.join(root, LOCK_FILE), "a+b")
+        with self._exclusive():
+            if _stat(self.groups_log) is None:
+                if legacy_file and os.path.exists(legacy_file):
+                    self._import_legacy(legacy_file)
+                else:
+                    _write_atomic(self.groups_log, [])
+            self._refresh()
+
+    # ---------------------------------------------- locking ---------------------------------------------- #
+
+    @contextmanager
+    def _exclusive(self):
+        """Write lock across threads and processes; nests within one thread"""
+        with self._lock:
+            if self._lock_depth == 0 and fcntl:
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                self._refresh()
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and fcntl:
+                    fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _shared(self):
+        """Read access: thread lock only, after catching up with other processes"""
+        with self._lock:
+            self._refresh()
+            yield
+
+    # ---------------------------------------------- index ---------------------------------------------- #
+
+    def _refresh(self):
+        """Applies groups.log records written since we last looked"""
+        with _open_for_read(self.groups_log) as f:
+            if f is not None:
+                self._refresh_from(f)
+
+    def _refresh_from(self, f):
+        st = os.fstat(f.fileno())
+        if st.st_ino != self._groups_inode or st.st_size < self._groups_position:
+            self._groups = {}
+            self._groups_by_member = {}
+            self._groups_inode = st.st_ino
+            self._groups_position = 0
+            self._log_records = 0
+        if st.st_size == self._groups_position:
+            return
+
+        f.seek(self._groups_position)
+        data = f.read(st.st_size - self._groups_position)
+        complete = data[:data.rfind(b"\n") + 1]  # a writer may be mid-line
+        for line in complete.splitlines():
+            if line.strip():
+                self._apply(loads(line))
+                self._log_records += 1
+        self._groups_position += len(complete)
+
+    def _apply(self, record):
+        op = record["op"]
+        name = record["group"]
+        email = record["email"]
+        if op == "create":
+            self._groups[name] = {"name": name, "members": {}}
+        if email and (op == "create" or op == "join"):
+            self._groups[name]["members"][email] = None
+            self._groups_by_member.setdefault(email, set()).add(name)
+
+    def _append_event(self, record):
+        """Caller holds _exclusive()"""
+        line = _encode(record)
+        with open(self.groups_log, "ab") as f:
+            f.write(line)
+        self._apply(record)
+        self._log_records += 1
+        self._groups_position += len(line)
+        if self._log_records - self._live_facts() > COMPACT_SLACK:
+            self.compact()
+
+    def _live_facts(self):
+        return sum(len(group["members"]) for group in self._groups.values())
+
+    def _message_log(self, name):
+        digest = hashlib.sha1(name.encode("utf-8")).hexdigest()
+        return os.path.join(self.messages_dir, digest + ".log")
+
+    def _import_legacy(self, legacy_file):
+        """One-time import of the old whole-file groups.json store"""
+        with open(legacy_file, "r") as f:
+            data = json.load(f)
+        self._write_snapshot(data.get("groups", {}))
+
+    def _write_snapshot(self, groups):
+        for name, group in groups.items():
+            self._write_messages(name, group.get("messages", []))
+        self._write_groups_log(groups)
+
+    def _write_groups_log(self, groups):
+        records = []
+        for name, group in groups.items():
+            members = list(group.get("members", []))
+            records.append({"op": "create", "group": name, "email": members[0] if members else None})
+            records.extend({"op": "join", "group": name, "email": email} for email in members[1:])
+        _write_atomic(self.groups_log, records)
+
+    def _tombstone_file(self, name):
+        return self._message_log(name)[:-len(".log")] + ".del"
+
+    def _write_messages(self, name, messages):
+        """Rewrites a group's log; messages keep their "id" when they have one"""
+        tmp_path = self._message_log(name) + ".tmp"
+        message_id = 0
+        with open(tmp_path, "wb") as f:
+            for msg in messages:
+                given = msg.get("id")
+                message_id = max(given if isinstance(given, int) else 0, message_id + 1)
+                f.write(_encode_message(message_id, msg))
+        os.replace(tmp_path, self._message_log(name))
+        if _stat(self._tombstone_file(name)) is not None:
+            os.remove(self._tombstone_file(name))
+        self._indexes.pop(name, None)
+
+    def _index(self, name):
+        """Offsets, ids and tombstones of the group's log, caught up with the files on disk"""
+        with self._open_log(name) as (_, index):
+            return index
+
+    @contextmanager
+    def _open_log(self, name):
+        """(f, index): the group's log opened for reading (None if it doesn't exist) and its index,
+        built through f, so messages read from f match the offsets.
+
+        Starts over when a rewrite swaps the log while we index it, since the tombstones
+        read after it may already belong to the new log.
+        """
+        path = self._message_log(name)
+        while True:
+            with _open_for_read(path) as f:
+                index = self._index_from(name, f)
+                st = _stat(path)
+                if (st.st_ino if st else None) == index.inode:
+                    yield f, index
+                    return
+
+    def _index_from(self, name, f):
+        if f is None:
+            self._indexes.pop(name, None)
+            return _LogIndex(None)
+
+        st = os.fstat(f.fileno())
+        index = self._indexes.get(name)
+        if index is None or index.inode != st.st_ino or st.st_size < index.offsets[-1]:
+            index = self._indexes[name] = _LogIndex(st.st_ino)
+        if st.st_size > index.offsets[-1]:
+            # Index lines appended since we last looked (by us or another process);
+            # nothing is added to the index until they have all been read
+            position = index.offsets[-1]
+            previous = index.ids[-1] if index.ids else 0
+            offsets, ids = array("Q"), array("Q")
+            f.seek(position)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # a writer may be mid-line
+                if line.strip():
+                    previous = _line_id(line, previous)
+                    offsets.append(position)
+                    ids.append(previous)
+                position += len(line)
+            offsets.append(position)
+            index.offsets.pop()
+            index.offsets.extend(offsets)
+            index.ids.extend(ids)
+        self._refresh_tombstones(name, index)
+        return index
+
+    def _refresh_tombstones(self, name, index):
+        with _open_for_read(self._tombstone_file(name)) as f:
+            st = os.fstat(f.fileno()) if f is not None else None
+            if st is None or st.st_ino != index.del_inode or st.st_size < index.del_position:
+                index.deleted = set()
+                index.del_inode = st.st_ino if st else None
+                index.del_position = 0
+            if st is None or st.st_size == index.del_position:
+                return
+            f.seek(index.del_position)
+            data = f.read(st.st_size - index.del_position)
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.split():
+            message_id = int(line)
+            if index.position(message_id) is not None:  # ids compacted away may linger after a crash
+                index.deleted.add(message_id)
+        index.del_position += len(complete)
+
+    # ---------------------------------------------- groups ---------------------------------------------- #
+
+    def has_group(self, name):
+        with self._shared():
+            return name in self._groups
+
+    def get_group(self, name):
+        with self._shared():
+            group = self._groups.get(name)
+            if group is None:
+                return None
+            return {"name": group["name"], "members": list(group["members"])}
+
+    def create_group(self, name, email):
+        """Returns False if the group already exists"""
+        with self._exclusive():
+            if name in self._groups:
+                return False
+            self._write_messages(name, [])
+            self._append_event({"op": "create", "group": name, "email": email})
+            return True
+
+    def add_member(self, name, email):
+        """Returns False if the user was already a member"""
+        with self._exclusive():
+            if email in self._groups[name]["members"]:
+                return False
+            self._append_event({"op": "join", "group": name, "email": email})
+            return True
+
+    def list_groups(self):
+        """Every group's name and members, without touching any message log"""
+        with self._shared():
+            return [
+                {"name": name, "members": list(group["members"]), "member_count": len(group["members"])}
+                for name, group in self._groups.items()
+            ]
+
+    def groups_for(self, email):
+        """Name and member count of each group the user belongs to"""
+        with self._shared():
+            return [
+                {"name": name, "member_count": len(self._groups[name]["members"])}
+                for name in sorted(self._groups_by_member.get(email, ()))
+            ]
+
+    # ---------------------------------------------- messages ---------------------------------------------- #
+
+    def append_messages(self, name, messages):
+        """Appends a batch with a single write; returns the id of the first message (the rest follow on)"""
+        # Encode outside the lock; only the id prefix depends on the log's current state
+        bodies = [_encode_message(0, msg)[len(ID_PREFIX) + 1:] for msg in messages]
+        with self._exclusive():
+            index = self._index(name)
+            first_id = (index.ids[-1] if index.ids else 0) + 1
+            lines = [
+                ID_PREFIX + str(first_id + i).encode("ascii") + body
+                for i, body in enumerate(bodies)
+            ]
+            with open(self._message_log(name), "ab") as f:
+                f.write(b"".join(lines))
+            if index.inode is None:
+                index = self._index(name)  # first write created the log
+            else:
+                for i, line in enumerate(lines):
+                    index.offsets.append(index.offsets[-1] + len(line))
+                    index.ids.append(first_id + i)
+            return first_id
+
+    def count_messages(self, name):
+        with self._shared():
+            index = self._index(name)
+            return len(index.ids) - len(index.deleted)
+
+    def read_messages(self, name, before=None, after=None, limit=50):
+        """One page of history, oldest first, skipping deleted messages.
+
+        With no cursor the newest page is returned; `before` pages backwards from an id
+        and `after` pages forwards from an id. Returns {"messages", "total",
+        "has_more_before", "has_more_after"}; each message carries its "id".
+        """
+        with self._shared(), self._open_log(name) as (f, index):
+            ids, deleted = index.ids, index.deleted
+            found = 0
+            if after is not None:
+                start = end = bisect_right(ids, after)
+                while end < len(ids) and found < limit:
+                    found += ids[end] not in deleted
+                    end += 1
+            else:
+                start = end = len(ids) if before is None else bisect_left(ids, before)
+                while start > 0 and found < limit:
+                    start -= 1
+                    found += ids[start] not in deleted
+            page = {
+                "messages": [],
+                "total": len(ids) - len(deleted),
+                "has_more_before": index.live_before(start),
+                "has_more_after": index.live_from(end)
+            }
+            if not found:
+                return page
+
+            f.seek(index.offsets[start])
+            chunk = f.read(index.offsets[end] - index.offsets[start])
+            page_ids = [(message_id, message_id not in deleted) for message_id in ids[start:end]]
+
+        position = 0
+        for line in chunk.splitlines():
+            if line.strip():
+                message_id, live = page_ids[position]
+                position += 1
+                if live:
+                    msg = loads(line)
+                    msg["id"] = message_id
+                    page["messages"].append(msg)
+        return page
+
+    def get_messages(self, name):
+        """Every live message of the group (reads the whole log)"""
+        with self._shared():
+            return self.read_messages(name, after=0, limit=len(self._index(name).ids))["messages"]
+
+    def delete_message(self, name, message_id):
+        """Tombstones one message; returns False if the group has no such (live) message"""
+        with self._exclusive():
+            index = self._index(name)
+            if index.position(message_id) is None or message_id in index.deleted:
+                return False
+            with open(self._tombstone_file(name), "ab") as f:
+                f.write(b"%d\n" % message_id)
+            self._refresh_tombstones(name, index)
+            return True
+
+    def compact_messages(self, name):
+        """Rewrites the group's log without its tombstoned messages; returns how many were dropped"""
+        with self._exclusive():
+            index = self._index(name)
+            if not index.deleted:
+                return 0
+            # The newest record stays (tombstoned) so the next append doesn't reuse its id
+            keep = index.ids[-1] if index.ids[-1] in index.deleted else None
+            path = self._message_log(name)
+            with open(path, "rb") as f:
+                data = f.read(index.offsets[-1])
+
+            tmp_path = path + ".tmp"
+            position = 0
+            with open(tmp_path, "wb") as f:
+                for line in data.splitlines():
+                    if not line.strip():
+                        continue
+                    message_id = index.ids[position]
+                    position += 1
+                    if message_id in index.deleted and message_id != keep:
+                        continue
+                    if line.startswith(ID_PREFIX):
+                        f.write(line + b"\n")
+                    else:
+                        f.write(_encode_message(message_id, loads(line)))
+            os.replace(tmp_path, path)
+
+            tombstones = self._tombstone_file(name)
+            with open(tombstones + ".tmp", "wb") as f:
+                if keep is not None:
+                    f.write(b"%d\n" % keep)
+            os.replace(tombstones + ".tmp", tombstones)
+            dropped = len(index.deleted) - (keep is not None)
+            self._indexes.pop(name, None)
+            return dropped
+
+    def compact_deleted(self, min_deleted=MESSAGE_COMPACT_MIN, ratio=MESSAGE_COMPACT_RATIO):
+        """Compacts every group with enough tombstones; returns how many messages were dropped"""
+        with self._shared():
+            names = []
+            for name in self._groups:
+                st = _stat(self._tombstone_file(name))
+                if st is not None and st.st_size:
+                    names.append(name)
+        dropped = 0
+        for name in names:
+            with self._shared():
+                index = self._index(name)
+                # A tombstoned newest record survives compaction, so it doesn't count
+                deleted = len(index.deleted) - (bool(index.ids) and index.ids[-1] in index.deleted)
+                total = len(index.ids)
+            if deleted and (deleted >= min_deleted or deleted >= ratio * total):
+                dropped += self.compact_messages(name)
+        return dropped
+
+    # ---------------------------------------------- whole store ---------------------------------------------- #
+
+    def reset(self):
+        with self._exclusive():
+            for filename in os.listdir(self.messages_dir):
+                os.remove(os.path.join(self.messages_dir, filename))
+            _write_atomic(self.groups_log, [])
+            self._indexes = {}
+            self._refresh()
+
+    def compact(self):
+        """Rewrites groups.log as one create/join record per live membership"""
+        with self._exclusive():
+            self._write_groups_log(self._groups)
+            st = _stat(self.groups_log)
+            self._groups_inode = st.st_ino
+            self._groups_position = st.st_size
+            self._log_records = self._live_facts()
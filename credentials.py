@@ -0,0 +1,144 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+#--------------------------------------------password credentials------------------------------------------------------#
+#
+# Passwords are stored as  scrypt$<n>$<r>$<p>$<salt>$<hash>  (base64 salt and hash), so
+# every row records the cost it was hashed with and the cost can be raised later
+# without invalidating anything. Rows that still hold a plaintext password (from
+# before hashing) or an outdated cost verify as before and report needs_rehash(),
+# so /login can upgrade them transparently.
+#
+# scrypt is deliberately slow, so:
+#   - hashing and verification run on a small thread pool, off the request thread
+#     (workers=0 runs them inline, e.g. for scripts). hashlib.scrypt releases the GIL
+#     for the whole KDF, so the pool threads hash in parallel with each other and
+#     with request handling, without child processes to fork, spawn or clean up.
+#   - recent successful verifications are remembered for cache_ttl seconds in a
+#     bounded LRU, keyed by an HMAC of (password, stored hash) under a per-process
+#     random key, so a login storm pays the KDF once per user and no password or
+#     password-equivalent digest is kept in memory. Changing the stored hash
+#     naturally misses the cache.
+#
+#-----------------------------------------------------------------------------------------------------------------------#
+
+SCHEME = "scrypt"
+SALT_BYTES = 16
+HASH_BYTES = 32
+
+
+def _scrypt(password, salt, n, r, p):
+    # maxmem must cover scrypt's 128 * n * r bytes working set, plus slack
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=HASH_BYTES)
+
+
+def _parse(stored):
+    """(n, r, p, salt, digest) for a scrypt hash, None for anything else (legacy plaintext)"""
+    parts = stored.split("$")
+    if len(parts) != 6 or parts[0] != SCHEME:
+        return None
+    try:
+        return int(parts[1]), int(parts[2]), int(parts[3]), base64.b64decode(parts[4]), base64.b64decode(parts[5])
+    except ValueError:
+        return None
+
+
+def _encode(n, r, p, salt, digest):
+    return "$".join([SCHEME, str(n), str(r), str(p),
+                     base64.b64encode(salt).decode("ascii"), base64.b64encode(digest).decode("ascii")])
+
+
+def _hash(password, n, r, p):
+    salt = os.urandom(SALT_BYTES)
+    return _encode(n, r, p, salt, _scrypt(password, salt, n, r, p))
+
+
+def _verify(password, stored):
+    parsed = _parse(stored)
+    if parsed is None:
+        return hmac.compare_digest(password.encode("utf-8"), stored.encode("utf-8"))
+    n, r, p, salt, digest = parsed
+    return hmac.compare_digest(_scrypt(password, salt, n, r, p), digest)
+
+
+class PasswordHasher:
+    def __init__(self, n=2 ** 14, r=8, p=1, workers=2, cache_ttl=300, cache_max_entries=10000):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.workers = workers
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self._pool = None
+        self._lock = threading.Lock()
+        self._cache_key = os.urandom(32)
+        self._verified = OrderedDict()  # hmac -> expires_at
+        self._stats = {"hashes": 0, "verifications": 0, "cache_hits": 0, "failures": 0, "rehashes": 0}
+
+    def hash(self, password):
+        with self._lock:
+            self._stats["hashes"] += 1
+        return self._run(_hash, password, self.n, self.r, self.p)
+
+    def verify(self, password, stored):
+        """True if password matches the stored hash (or legacy plaintext)"""
+        if not password or not stored:
+            return False
+        key = hmac.new(self._cache_key, f"{password}\0{stored}".encode("utf-8"), hashlib.sha256).digest()
+        now = time.time()
+        with self._lock:
+            expires_at = self._verified.get(key)
+            if expires_at is not None:
+                if expires_at > now:
+                    self._verified.move_to_end(key)
+                    self._stats["cache_hits"] += 1
+                    return True
+                del self._verified[key]
+            self._stats["verifications"] += 1
+
+        if _parse(stored) is None:
+            ok = _verify(password, stored)  # plaintext compare, not worth a trip to the pool
+        else:
+            ok = self._run(_verify, password, stored)
+
+        with self._lock:
+            if not ok:
+                self._stats["failures"] += 1
+            elif self.cache_ttl > 0:
+                self._verified[key] = now + self.cache_ttl
+                while len(self._verified) > self.cache_max_entries:
+                    self._verified.popitem(last=False)
+        return ok
+
+    def needs_rehash(self, stored):
+        """True for legacy plaintext rows and hashes made with a different cost"""
+        parsed = _parse(stored)
+        return parsed is None or parsed[:3] != (self.n, self.r, self.p)
+
+    def rehashed(self):
+        with self._lock:
+            self._stats["rehashes"] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["cached"] = len(self._verified)
+        stats["cost"] = {"n": self.n, "r": self.r, "p": self.p}
+        stats["workers"] = self.workers
+        return stats
+
+    def _run(self, fn, *args):
+        if not self.workers:
+            return fn(*args)
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="kdf")
+        return self._pool.submit(fn, *args).result()
@@ -0,0 +1,144 @@
+from contextlib import contextmanager
+import os
+import sqlite3
+import threading
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+#--------------------------------------------database config------------------------------------------------------#
+#
+# Everything here is read from the environment, so the app can be pointed at another
+# database (or tuned) without code changes:
+#
+#   DATABASE_URL                users database (default sqlite:///users.db, relative to instance/)
+#   NOTIFICATIONS_DATABASE_URL  notifications bind (default sqlite:///notifications.db)
+#   DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT   connection pool of every engine
+#   DB_JOURNAL_MODE, DB_SYNCHRONOUS, DB_BUSY_TIMEOUT_MS, DB_MMAP_SIZE   SQLite pragmas
+#   DATABASE_READ_URL           optional replica for read_session(); see ReadSessions
+#
+# Every SQLite connection opened through SQLAlchemy is switched to WAL on connect:
+# readers no longer wait for a writer's commit, and synchronous=NORMAL only fsyncs at
+# checkpoints. busy_timeout makes a second writer wait for the lock instead of failing
+# straight away with "database is locked", and mmap_size lets reads skip the read() copy.
+# The plain sqlite3 files beside the app (rate limits, AI cache, chat search, pub/sub)
+# get the same pragmas through connect_sqlite() / SQLitePool.
+#
+#-----------------------------------------------------------------------------------------------------------------#
+
+SQLITE_PRAGMAS = {
+    "journal_mode": os.environ.get("DB_JOURNAL_MODE", "WAL"),
+    "synchronous": os.environ.get("DB_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.environ.get("DB_BUSY_TIMEOUT_MS", 5000)),
+    "mmap_size": int(os.environ.get("DB_MMAP_SIZE", 256 * 1024 * 1024))
+}
+
+# Shared by every engine Flask-SQLAlchemy creates (the default one and each bind)
+ENGINE_OPTIONS = {
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", 10)),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 20)),
+    "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT", 30)),
+    "pool_pre_ping": True
+}
+
+
+def database_url(env_var, default):
+    return os.environ.get(env_var) or default
+
+
+def _apply_pragmas(conn):
+    cursor = conn.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        try:
+            cursor.execute(f"PRAGMA {name}={value}")
+        except sqlite3.OperationalError:
+            # journal_mode is stored in the file and needs write access; read-only
+            # connections (ReadSessions) leave it to the write engine
+            if name != "journal_mode":
+                raise
+    cursor.close()
+
+
+@event.listens_for(Engine, "connect")
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        _apply_pragmas(dbapi_connection)
+
+
+def connect_sqlite(path, isolation_level="", check_same_thread=True):
+    """Plain sqlite3 connection with SQLITE_PRAGMAS applied, like every SQLAlchemy engine's"""
+    conn = sqlite3.connect(path, isolation_level=isolation_level, check_same_thread=check_same_thread)
+    _apply_pragmas(conn)
+    return conn
+
+
+class SQLitePool:
+    """Reusable connect_sqlite() connections to one file, borrowed for one operation at a time.
+
+    The threaded server runs every request on a new thread, so connections are kept in a
+    shared pool instead of per thread, where each would be opened for a single request.
+    """
+
+    def __init__(self, path, isolation_level="", max_idle=8):
+        self.path = path
+        self.isolation_level = isolation_level
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = []
+
+    @contextmanager
+    def connection(self):
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = connect_sqlite(self.path, self.isolation_level, check_same_thread=False)
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()  # never hand an open transaction to the next borrower
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+
+class ReadSessions:
+    """Short-lived sessions for read-only work, kept off the write engine's pool.
+
+    Writes keep using db.session. Reads through read_session() go to DATABASE_READ_URL when
+    it is set, otherwise to a second engine on the same database; for SQLite that engine
+    opens its connections read-only, so a read path can never take the write lock.
+    """
+
+    def __init__(self, db, read_url=None):
+        self.db = db
+        self.read_url = read_url
+        self._engines = {}
+
+    def engine(self, bind_key=None):
+        engine = self._engines.get(bind_key)
+        if engine is None:
+            write_engine = self.db.engines[bind_key]
+            if self.read_url and bind_key is None:
+                engine = create_engine(self.read_url, **ENGINE_OPTIONS)
+            elif write_engine.url.get_backend_name() == "sqlite" and write_engine.url.database not in (None, "", ":memory:"):
+                # Let the write side create the file and switch it to WAL before any reader opens it
+                write_engine.connect().close()
+                engine = create_engine(
+                    f"sqlite:///file:{write_engine.url.database}?mode=ro&uri=true", **ENGINE_OPTIONS
+                )
+            else:
+                engine = write_engine
+            self._engines[bind_key] = engine
+        return engine
+
+    @contextmanager
+    def session(self, bind_key=None):
+        session = Session(bind=self.engine(bind_key), autoflush=False, expire_on_commit=False)
+        try:
+            yield session
+        finally:
+            session.close()
@@ -0,0 +1,343 @@
+from collections import Counter
+from contextlib import contextmanager
+from functools import wraps
+import bisect
+import logging
+import os
+import sys
+import threading
+import time
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+#--------------------------------------------metrics------------------------------------------------------#
+#
+# In-process counters and latency histograms, served on /metrics in the Prometheus
+# text format (one scrape per worker process; let Prometheus sum across workers).
+#
+#   instrument_flask(app)         every route: learnflare_http_request_duration_seconds{method,route,status}
+#   instrument_socketio(sio)      every socketio.on handler registered afterwards:
+#                                 learnflare_socketio_handler_duration_seconds{event},
+#                                 learnflare_socketio_handler_errors_total{event}
+#   instrument_sqlalchemy()       every query on every engine: learnflare_db_query_duration_seconds{db,statement}
+#   time_methods(obj, ...)        selected methods of one object (chat store, search index, model client):
+#                                 learnflare_<component>_duration_seconds{method}
+#   add_collector(name, fn)       exports a component's existing stats() dict as gauges
+#
+# Recording is a dict lookup and a bisect under one lock, so it stays on in production.
+#
+# The sampling profiler is opt-in (PROFILE_DIR): a sampled request (PROFILE_SAMPLE_RATE,
+# or any request sent with "X-Profile: 1") has its thread's stack sampled every
+# PROFILE_INTERVAL_MS, and the samples are written as folded stacks
+# ("frame;frame;frame count" lines) to PROFILE_DIR/<time>-<route>.folded, ready for
+# flamegraph.pl or speedscope.
+#
+#----------------------------------------------------------------------------------------------------------#
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "learnflare_"
+
+# Seconds; fine-grained at the low end where most routes live
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    __slots__ = ("counts", "count", "total")
+
+    def __init__(self, buckets):
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._histograms = {}  # name -> {labels tuple: _Histogram}
+        self._counters = {}    # name -> {labels tuple: value}
+        self._help = {}
+        self._collectors = {}  # name -> fn returning a (possibly nested) dict of numbers
+
+    # ---------------------------------------------- recording ---------------------------------------------- #
+
+    def observe(self, name, seconds, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = _Histogram(self.buckets)
+            index = bisect.bisect_left(self.buckets, seconds)
+            if index < len(self.buckets):
+                histogram.counts[index] += 1
+            histogram.count += 1
+            histogram.total += seconds
+
+    def inc(self, name, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def add_collector(self, name, fn):
+        """Exports fn()'s numbers (e.g. a component's stats()) as learnflare_<name>_<key> gauges"""
+        self._collectors[name] = fn
+
+    # ---------------------------------------------- exposition ---------------------------------------------- #
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        with self._lock:
+            histograms = {
+                name: {key: (list(h.counts), h.count, h.total) for key, h in series.items()}
+                for name, series in self._histograms.items()
+            }
+            counters = {name: dict(series) for name, series in self._counters.items()}
+
+        lines = []
+        for name in sorted(histograms):
+            full = PREFIX + name
+            lines.append(f"# HELP {full} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {full} histogram")
+            for key, (counts, count, total) in sorted(histograms[name].items(), key=lambda item: str(item[0])):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{full}_bucket{_label_text(key + (('le', _format_value(bound)),))} {cumulative}")
+                lines.append(f"{full}_bucket{_label_text(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{full}_sum{_label_text(key)} {_format_value(total)}")
+                lines.append(f"{full}_count{_label_text(key)} {count}")
+        for name in sorted(counters):
+            full = PREFIX + name
+            lines.append(f"# HELP {full} {self._help.get(name, name)}")
+            lines.append(f"# TYPE {full} counter")
+            for key, value in sorted(counters[name].items(), key=lambda item: str(item[0])):
+                lines.append(f"{full}{_label_text(key)} {_format_value(value)}")
+        for name, fn in sorted(self._collectors.items()):
+            try:
+                values = _flatten(fn())
+            except Exception:
+                logger.exception("Metrics collector %s failed", name)
+                continue
+            for key, value in values:
+                full = f"{PREFIX}{name}_{key}"
+                lines.append(f"# TYPE {full} gauge")
+                lines.append(f"{full} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(stats, prefix=""):
+    """(key, number) pairs of a nested stats dict; non-numeric values are skipped"""
+    for key, value in stats.items():
+        key = prefix + "".join(c if c.isalnum() else "_" for c in str(key))
+        if isinstance(value, dict):
+            yield from _flatten(value, key + "_")
+        elif isinstance(value, bool):
+            yield key, int(value)
+        elif isinstance(value, (int, float)):
+            yield key, value
+
+
+metrics = MetricsRegistry()
+metrics.describe("http_request_duration_seconds", "Flask request latency, until the response is returned")
+metrics.describe("socketio_handler_duration_seconds", "Socket.IO event handler latency")
+metrics.describe("socketio_handler_errors_total", "Socket.IO event handlers that raised")
+metrics.describe("db_query_duration_seconds", "SQLAlchemy statement latency")
+
+
+#--------------------------------------------instrumentation------------------------------------------------------#
+
+def instrument_flask(app, registry=metrics, profiler=None):
+    @app.before_request
+    def _start_timer():
+        g.metrics_started = time.perf_counter()
+        if profiler is not None:
+            profiler.maybe_start()
+
+    @app.teardown_request
+    def _record(error=None):
+        started = g.pop("metrics_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        status = getattr(g, "metrics_status", None) or (500 if error is not None else 200)
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        registry.observe("http_request_duration_seconds", elapsed, method=request.method, route=route, status=status)
+        if profiler is not None:
+            profiler.maybe_stop(f"{request.method} {route}")
+
+    @app.after_request
+    def _remember_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+
+def instrument_socketio(socketio, registry=metrics):
+    """Times every handler registered with socketio.on() from here on"""
+    register = socketio.on
+
+    def on(message, namespace=None):
+        decorator = register(message, namespace)
+
+        def timed(handler):
+            @wraps(handler)
+            def _handler(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return handler(*args, **kwargs)
+                except Exception:
+                    registry.inc("socketio_handler_errors_total", event=message)
+                    raise
+                finally:
+                    registry.observe("socketio_handler_duration_seconds", time.perf_counter() - started, event=message)
+            decorator(_handler)
+            return handler
+        return timed
+
+    socketio.on = on
+
+
+def instrument_sqlalchemy(registry=metrics):
+    """Times every statement on every engine (users and notifications binds alike)"""
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stack = conn.info.get("metrics_started")
+        if stack:
+            registry.observe(
+                "db_query_duration_seconds", time.perf_counter() - stack.pop(),
+                db=os.path.basename(conn.engine.url.database or "") or conn.engine.url.get_backend_name(),
+                statement=statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+            )
+
+    @event.listens_for(Engine, "handle_error")
+    def _error(context):
+        stack = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+
+
+def time_methods(obj, component, names, registry=metrics):
+    """Replaces obj's methods with timed versions: learnflare_<component>_duration_seconds{method}.
+
+    Methods returning an iterator (streaming model calls) are timed to the first item
+    ({method}_first_chunk) and to exhaustion.
+    """
+    metric = f"{component}_duration_seconds"
+    registry.describe(metric, f"{component} call latency")
+    for name in names:
+        setattr(obj, name, _timed(getattr(obj, name), metric, name, registry))
+    return obj
+
+
+def _timed(method, metric, name, registry):
+    @wraps(method)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        result = method(*args, **kwargs)
+        if hasattr(result, "__next__"):
+            return _timed_iterator(result, started, metric, name, registry)
+        registry.observe(metric, time.perf_counter() - started, method=name)
+        return result
+    return timed
+
+
+def _timed_iterator(iterator, started, metric, name, registry):
+    first = True
+    try:
+        for item in iterator:
+            if first:
+                registry.observe(metric, time.perf_counter() - started, method=name + "_first_chunk")
+                first = False
+            yield item
+    finally:
+        registry.observe(metric, time.perf_counter() - started, method=name)
+
+
+#--------------------------------------------sampling profiler------------------------------------------------------#
+
+class SamplingProfiler:
+    """Samples the request thread's stack while a sampled request runs; writes folded stacks"""
+
+    def __init__(self, output_dir, sample_rate=0.0, interval=0.005, header="X-Profile"):
+        self.output_dir = output_dir
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.header = header
+        self._request_count = 0
+        self._lock = threading.Lock()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def maybe_start(self):
+        with self._lock:
+            self._request_count += 1
+            sampled = self.sample_rate > 0 and self._request_count % max(int(1 / self.sample_rate), 1) == 0
+        if not (sampled or request.headers.get(self.header) == "1"):
+            return
+        stop = threading.Event()
+        samples = Counter()
+        thread = threading.Thread(target=self._sample, args=(threading.get_ident(), stop, samples), daemon=True)
+        g.profile = (stop, samples, thread, time.time())
+        thread.start()
+
+    def maybe_stop(self, label):
+        profile = g.pop("profile", None)
+        if profile is None:
+            return
+        stop, samples, thread, started_at = profile
+        stop.set()
+        thread.join()
+        if not samples:
+            return
+        safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_")
+        path = os.path.join(self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(started_at))}"
+                                             f"-{int(started_at * 1000) % 1000:03d}-{safe_label}.folded")
+        with open(path, "w") as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def _sample(self, thread_id, stop, samples):
+        while not stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                samples[";".join(reversed(stack))] += 1
@@ -0,0 +1,81 @@
+"""baseline: user table and notification table with their indexes
+
+Databases created before migrations existed (by db.create_all()) already hold some
+or all of this schema, so every step only adds what is missing; upgrading one of
+them keeps its rows and simply records this revision.
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001_baseline'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade(engine_name):
+    globals()["upgrade_%s" % engine_name]()
+
+
+def downgrade(engine_name):
+    globals()["downgrade_%s" % engine_name]()
+
+
+def _has_table(name):
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def _columns(table):
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade_():
+    if not _has_table("user"):
+        op.create_table(
+            "user",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("name", sa.String(length=120), nullable=False),
+            sa.Column("surname", sa.String(length=120), nullable=False),
+            sa.Column("email", sa.String(length=120), nullable=False),
+            sa.Column("mobile", sa.String(length=15), nullable=False),
+            sa.Column("password", sa.String(length=120), nullable=False),
+            sa.Column("role", sa.String(length=20), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+            sa.UniqueConstraint("email")
+        )
+    # Expression index: invisible to reflection, so rely on IF NOT EXISTS
+    op.create_index("ix_user_email_lower", "user", [sa.text("lower(email)")], if_not_exists=True)
+
+
+def downgrade_():
+    op.drop_index("ix_user_email_lower", table_name="user", if_exists=True)
+    op.drop_table("user")
+
+
+def upgrade_notifications():
+    if not _has_table("notification"):
+        op.create_table(
+            "notification",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("title", sa.String(length=100), nullable=False),
+            sa.Column("message", sa.String(length=200), nullable=False),
+            sa.Column("type", sa.String(length=50), nullable=False),
+            sa.Column("topic", sa.String(length=100), nullable=True),
+            sa.Column("timestamp", sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint("id")
+        )
+    elif "topic" not in _columns("notification"):
+        op.add_column("notification", sa.Column("topic", sa.String(length=100), nullable=True))
+    op.create_index("ix_notification_timestamp_id", "notification", ["timestamp", "id"], if_not_exists=True)
+
+
+def downgrade_notifications():
+    op.drop_index("ix_notification_timestamp_id", table_name="notification", if_exists=True)
+    op.drop_table("notification")
@@ -1,50 +1,140 @@
-from flask import Flask, jsonify, request
-from flask_sqlalchemy import SQLAlchemy
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import insert
 from datetime import datetime
+import logging
+from authApp import db
 
-notificationApp = Flask(__name__)
-notificationApp.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///notifications.db'
-notificationApp.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+logger = logging.getLogger(__name__)
 
-db = SQLAlchemy(notificationApp)
+# Registered on the main app by allRoutes.py; the database is the "notifications" bind
+# configured in authApp.py (SQLALCHEMY_BINDS / NOTIFICATIONS_DATABASE_URL)
+notifications_bp = Blueprint("notifications", __name__)
+
+NOTIFICATIONS_BIND = "notifications"
 
 # Database Model
 class Notification(db.Model):
+    __bind_key__ = NOTIFICATIONS_BIND
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     message = db.Column(db.String(200), nullable=False)
     type = db.Column(db.String(50), nullable=False)
+    topic = db.Column(db.String(100), nullable=True)  # optional audience, e.g. a course id
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
-# Initialize database
-def init_db():
-    with notificationApp.app_context():
-        db.create_all()
+    # Feed order is (timestamp, id) descending; this index serves it and the keyset cursors
+    __table_args__ = (db.Index("ix_notification_timestamp_id", "timestamp", "id"),)
+
+NOTIFICATIONS_PAGE_SIZE = 50
+NOTIFICATIONS_MAX_PAGE_SIZE = 200
+
+def serialize_notification(n):
+    return {
+        "id": n.id,
+        "title": n.title,
+        "message": n.message,
+        "type": n.type,
+        "topic": n.topic,
+        "timestamp": n.timestamp.isoformat()
+    }
+
+#--------------------------------------------push delivery------------------------------------------------------#
+#
+# Everything that inserts notifications hands the committed rows to publish_notifications,
+# which calls every registered listener with the serialized list. allRoutes.py registers
+# one that pushes them to subscribed Socket.IO clients.
+
+_listeners = []
+
+def add_notification_listener(listener):
+    _listeners.append(listener)
+    return listener
 
-# Endpoint to fetch notifications
-@notificationApp.route('/notifications', methods=['GET'])
+def publish_notifications(notifications):
+    for listener in _listeners:
+        try:
+            listener(notifications)
+        except Exception:
+            # the rows are committed either way; pollers and catch-up still see them
+            logger.exception("Notification listener failed")
+
+CATCH_UP_MAX = 500
+
+def notifications_since(last_seen_id, topics=None, types=None, limit=CATCH_UP_MAX):
+    """Serialized notifications with id > last_seen_id, oldest first, matching the filters"""
+    query = Notification.query.filter(Notification.id > last_seen_id)
+    if topics:
+        query = query.filter(Notification.topic.in_(topics))
+    if types:
+        query = query.filter(Notification.type.in_(types))
+    return [serialize_notification(n) for n in query.order_by(Notification.id).limit(limit).all()]
+
+#-----------------------------------------------------------------------------------------------------------------#
+
+# Endpoint to fetch notifications, newest first, one page at a time.
+#   ?limit=N            page size (default 50, max 200)
+#   ?before_id=<id>     older page: everything after that notification in feed order
+#   ?since=<id>         incremental poll: only notifications newer than that id
+# Responses carry an ETag; a matching If-None-Match gets 304 without touching the table.
+@notifications_bp.route('/notifications', methods=['GET'])
 def get_notifications():
-    notifications = Notification.query.order_by(Notification.timestamp.desc()).all()
-    return jsonify([
-        {
-            "id": n.id,
-            "title": n.title,
-            "message": n.message,
-            "type": n.type,
-            "timestamp": n.timestamp.isoformat()
-        } for n in notifications
-    ])
-
-# Endpoint to add a notification
-@notificationApp.route('/notifications', methods=['POST'])
+    try:
+        limit = min(int(request.args.get('limit', NOTIFICATIONS_PAGE_SIZE)), NOTIFICATIONS_MAX_PAGE_SIZE)
+        before_id = int(request.args['before_id']) if 'before_id' in request.args else None
+        since = int(request.args['since']) if 'since' in request.args else None
+    except ValueError:
+        return jsonify({"error": "limit, before_id and since must be integers"}), 400
+    if limit < 1:
+        return jsonify({"error": "limit must be positive"}), 400
+
+    # Rows are only ever inserted, so the newest id identifies the feed's state
+    latest_id = db.session.query(db.func.max(Notification.id)).scalar() or 0
+    etag = f"{latest_id}-{limit}-{before_id}-{since}"
+    if request.if_none_match.contains_weak(etag):  # compressed responses carry the weak form
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    query = Notification.query
+    if since is not None:
+        query = query.filter(Notification.id > since)
+    if before_id is not None:
+        cursor = db.session.get(Notification, before_id)
+        if cursor is None:
+            return jsonify({"error": "Unknown before_id"}), 400
+        query = query.filter(db.or_(
+            Notification.timestamp < cursor.timestamp,
+            db.and_(Notification.timestamp == cursor.timestamp, Notification.id < cursor.id)
+        ))
+    notifications = query.order_by(Notification.timestamp.desc(), Notification.id.desc()).limit(limit + 1).all()
+
+    has_more = len(notifications) > limit
+    notifications = notifications[:limit]
+
+    response = jsonify([serialize_notification(n) for n in notifications])
+    response.set_etag(etag)
+    response.headers["X-Latest-Id"] = str(latest_id)
+    response.headers["X-Has-More"] = "true" if has_more else "false"
+    if notifications:
+        response.headers["X-Before-Cursor"] = str(notifications[-1].id)
+    return response
+
+REQUIRED_FIELDS = ['title', 'message', 'type']
+BULK_CHUNK_SIZE = 500
+BULK_MAX_ITEMS = 10000
+
+# Endpoint to add a notification (or many: see add_notifications_bulk)
+@notifications_bp.route('/notifications', methods=['POST'])
 def add_notification():
     data = request.json
     if not data:
         return jsonify({"error": "No data provided"}), 400
+
+    if isinstance(data, list):
+        return add_notifications_bulk(data)
     
     # Check for required fields
-    required_fields = ['title', 'message', 'type']
-    missing_fields = [field for field in required_fields if field not in data]
+    missing_fields = [field for field in REQUIRED_FIELDS if field not in data]
     
     if missing_fields:
         return jsonify({
@@ -56,13 +146,74 @@ def add_notification():
         new_notification = Notification(
             title=data['title'],
             message=data['message'],
-            type=data['type']
+            type=data['type'],
+            topic=data.get('topic')
         )
         db.session.add(new_notification)
         db.session.commit()
+        publish_notifications([serialize_notification(new_notification)])
         return jsonify({"message": "Notification added successfully!"}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Failed to add notification", "details": str(e)}), 500
 
+# Array body on POST /notifications: every item is validated with the same rules as a
+# single add, valid ones are inserted with executemany in BULK_CHUNK_SIZE transactions.
+# Returns 201 if everything went in, 207 with a per-item "errors" array otherwise.
+def _insert_notifications(rows):
+    """Inserts and commits one multi-row statement, then pushes the new rows; returns how many"""
+    created = db.session.execute(
+        insert(Notification).returning(Notification, sort_by_parameter_order=True),
+        [row for _, row in rows]
+    ).scalars().all()
+    published = [serialize_notification(n) for n in created]
+    db.session.commit()
+    publish_notifications(published)
+    return len(created)
+
+def add_notifications_bulk(items):
+    if len(items) > BULK_MAX_ITEMS:
+        return jsonify({"error": f"At most {BULK_MAX_ITEMS} notifications per request"}), 413
+
+    errors = []
+    rows = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "error": "Notification must be an object"})
+            continue
+        missing_fields = [field for field in REQUIRED_FIELDS if field not in item]
+        if missing_fields:
+            errors.append({"index": index, "error": "Missing required fields", "missing_fields": missing_fields})
+            continue
+        invalid_fields = [field for field in REQUIRED_FIELDS if not isinstance(item[field], str)]
+        if item.get('topic') is not None and not isinstance(item['topic'], str):
+            invalid_fields.append('topic')
+        if invalid_fields:
+            errors.append({"index": index, "error": "Fields must be strings", "invalid_fields": invalid_fields})
+            continue
+        rows.append((index, {
+            "title": item['title'], "message": item['message'], "type": item['type'], "topic": item.get('topic')
+        }))
+
+    inserted = 0
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_CHUNK_SIZE]
+        try:
+            inserted += _insert_notifications(chunk)
+        except Exception:
+            db.session.rollback()
+            # One bad row fails the whole statement; retry the chunk row by row so only it is reported
+            for index, row in chunk:
+                try:
+                    inserted += _insert_notifications([(index, row)])
+                except Exception as e:
+                    db.session.rollback()
+                    errors.append({"index": index, "error": "Failed to add notification", "details": str(e)})
 
+    errors.sort(key=lambda error: error["index"])
+    status = 201 if not errors else 207
+    return jsonify({
+        "message": f"{inserted} of {len(items)} notifications added",
+        "inserted": inserted,
+        "errors": errors
+    }), status
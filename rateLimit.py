@@ -0,0 +1,231 @@
+from collections import OrderedDict
+import math
+import threading
+import time
+from dbConfig import SQLitePool
+
+#--------------------------------------------rate limiting------------------------------------------------------#
+#
+# Token buckets keyed by (scope, client): a bucket holds up to `capacity` tokens and
+# refills at capacity / period per second; every request takes one. A client can burst
+# up to capacity requests, then gets one more every period / capacity seconds.
+#
+# Daily quotas count estimated model tokens per client and UTC day.
+#
+# Two interchangeable backends hold the state:
+#   MemoryBackend   per process, LRU-bounded; limits are per worker
+#   SQLiteBackend   one file shared by every worker on the host, so limits hold across them
+#
+#   RateLimiter(backend, {"generate": parse_rate("20/60")}).hit("generate", key) -> (allowed, retry_after)
+#   QuotaTracker(backend, daily_limit).remaining(key) / .charge(key, tokens) / .usage(key)
+#
+#----------------------------------------------------------------------------------------------------------------#
+
+DAY = 86400
+PERIOD_UNITS = {"s": 1, "m": 60, "h": 3600, "d": DAY}
+
+# Gemini's rule of thumb for English text; the SDK calls don't report token usage back to us
+CHARS_PER_TOKEN = 4
+
+
+def parse_rate(spec):
+    """Parses "20/60" (20 requests per 60 seconds; "20/1m" and "500/1d" work too) into (capacity, period).
+
+    "", "0" and "off" mean no limit (None).
+    """
+    spec = (spec or "").strip().lower()
+    if spec in ("", "0", "off", "none"):
+        return None
+    count, _, period = spec.partition("/")
+    period = period or "1"
+    unit = PERIOD_UNITS.get(period[-1])
+    seconds = float(period[:-1] or 1) * unit if unit else float(period)
+    if int(count) <= 0 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit {spec!r}")
+    return int(count), seconds
+
+
+def estimate_tokens(chars):
+    return math.ceil(chars / CHARS_PER_TOKEN)
+
+
+def utc_day(now):
+    return time.strftime("%Y-%m-%d", time.gmtime(now))
+
+
+#--------------------------------------------backends------------------------------------------------------#
+
+class MemoryBackend:
+    """Buckets and quota counters in this process; the least recently used buckets go first"""
+
+    name = "memory"
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # key -> (tokens, updated)
+        self._usage = {}               # (key, day) -> tokens used
+        self._day = None
+
+    def take(self, key, capacity, rate, cost, now):
+        """Takes cost tokens if the bucket has them; returns (allowed, tokens left)"""
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)  # a forgotten bucket is a full one
+        return allowed, tokens
+
+    def add_usage(self, key, day, amount):
+        with self._lock:
+            if day != self._day:
+                self._usage = {k: v for k, v in self._usage.items() if k[1] >= day}
+                self._day = day
+            self._usage[(key, day)] = self._usage.get((key, day), 0) + amount
+
+    def usage(self, key, day):
+        with self._lock:
+            return self._usage.get((key, day), 0)
+
+
+class SQLiteBackend:
+    """Buckets and quota counters in one SQLite file, updated in write transactions across workers"""
+
+    name = "sqlite"
+
+    def __init__(self, path, prune_every=1000):
+        self.path = path
+        self.prune_every = prune_every
+        self._pool = SQLitePool(path, isolation_level=None)  # autocommit; take() runs its own transaction
+        self._writes = 0
+        with self._pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_rate_buckets_full_at ON rate_buckets (full_at)")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ai_quota ("
+                "key TEXT NOT NULL, day TEXT NOT NULL, used INTEGER NOT NULL, PRIMARY KEY (key, day))"
+            )
+
+    def take(self, key, capacity, rate, cost, now):
+        with self._pool.connection() as conn:
+            # IMMEDIATE takes the write lock up front: read-modify-write without lost updates
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+                tokens = capacity if row is None else min(capacity, row[0] + (now - row[1]) * rate)
+                allowed = tokens >= cost
+                if allowed:
+                    tokens -= cost
+                conn.execute(
+                    "INSERT OR REPLACE INTO rate_buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                    (key, tokens, now, now + (capacity - tokens) / rate)
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        self._maybe_prune(now)
+        return allowed, tokens
+
+    def add_usage(self, key, day, amount):
+        with self._pool.connection() as conn:
+            conn.execute(
+                "INSERT INTO ai_quota (key, day, used) VALUES (?, ?, ?) "
+                "ON CONFLICT (key, day) DO UPDATE SET used = used + excluded.used",
+                (key, day, amount)
+            )
+
+    def usage(self, key, day):
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT used FROM ai_quota WHERE key = ? AND day = ?", (key, day)).fetchone()
+        return row[0] if row else 0
+
+    def _maybe_prune(self, now):
+        self._writes += 1
+        if self._writes % self.prune_every:
+            return
+        with self._pool.connection() as conn:
+            # A bucket that has refilled is indistinguishable from a missing one
+            conn.execute("DELETE FROM rate_buckets WHERE full_at <= ?", (now,))
+            conn.execute("DELETE FROM ai_quota WHERE day < ?", (utc_day(now - DAY),))
+
+
+#--------------------------------------------limits------------------------------------------------------#
+
+class RateLimiter:
+    def __init__(self, backend, rules):
+        """rules: {scope: (capacity, period seconds) or None for no limit}"""
+        self.backend = backend
+        self.rules = {scope: rule for scope, rule in rules.items() if rule is not None}
+        self._lock = threading.Lock()
+        self._stats = {"allowed": {scope: 0 for scope in self.rules}, "limited": {scope: 0 for scope in self.rules}}
+
+    def hit(self, scope, key, cost=1):
+        """Takes cost tokens from key's bucket in scope; returns (allowed, seconds until it would be allowed)"""
+        rule = self.rules.get(scope)
+        if rule is None:
+            return True, 0.0
+        capacity, period = rule
+        rate = capacity / period
+        allowed, tokens = self.backend.take(f"{scope}:{key}", capacity, rate, cost, time.time())
+        with self._lock:
+            self._stats["allowed" if allowed else "limited"][scope] += 1
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+    def stats(self):
+        with self._lock:
+            stats = {name: dict(counts) for name, counts in self._stats.items()}
+        stats["rules"] = {scope: f"{capacity}/{period:g}s" for scope, (capacity, period) in self.rules.items()}
+        stats["backend"] = self.backend.name
+        return stats
+
+
+class QuotaTracker:
+    """Estimated model tokens used per key and UTC day, against an optional daily limit (0 = unlimited)"""
+
+    def __init__(self, backend, daily_limit=0):
+        self.backend = backend
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+        self._stats = {"charged_tokens": 0, "exhausted": 0}
+
+    def remaining(self, key):
+        """Tokens left today, None when unlimited; counts a refusal when there are none left"""
+        if not self.daily_limit:
+            return None
+        left = max(self.daily_limit - self.backend.usage(key, utc_day(time.time())), 0)
+        if left == 0:
+            with self._lock:
+                self._stats["exhausted"] += 1
+        return left
+
+    def charge(self, key, tokens):
+        if tokens <= 0:
+            return
+        self.backend.add_usage(key, utc_day(time.time()), tokens)
+        with self._lock:
+            self._stats["charged_tokens"] += tokens
+
+    def usage(self, key):
+        now = time.time()
+        used = self.backend.usage(key, utc_day(now))
+        return {
+            "used": used,
+            "limit": self.daily_limit or None,
+            "remaining": max(self.daily_limit - used, 0) if self.daily_limit else None,
+            "resets_in": int(DAY - now % DAY)
+        }
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["daily_limit"] = self.daily_limit
+        stats["backend"] = self.backend.name
+        return stats
@@ -1,8 +1,7 @@
 from authApp import app, init_db
-import allRoutes  # Ensure routes are registered
-from notifications import notificationApp  # Import the notifications module
+import allRoutes  # Ensure routes are registered (/notifications included)
 
 if __name__ == '__main__':
-    init_db()  # Initialize the database
+    init_db()  # Apply pending schema migrations (users and notifications); existing data is kept
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,127 @@
+import gzip
+import json
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # in requirements.txt; without it only JSON batches are offered
+    msgpack = None
+
+#--------------------------------------------serialization------------------------------------------------------#
+#
+#   dumps(obj)              compact UTF-8 JSON bytes; orjson when installed (several times faster),
+#                           else the stdlib, compact and ASCII-escaped (escaping beats encoding a
+#                           str that holds a single emoji to UTF-8)
+#   loads(data)             the matching decoder
+#   FastJSONProvider        app.json provider: jsonify() goes through dumps(), compact and unsorted
+#   enable_compression(app) gzip / br for large responses, negotiated from Accept-Encoding
+#   packb(obj)              MessagePack, for Socket.IO clients that opt in to binary batches
+#
+#----------------------------------------------------------------------------------------------------------------#
+
+# Only bodies at least this large are compressed; below it the headers cost more than they save
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_MIMETYPES = {"application/json", "application/javascript", "application/x-ndjson", "image/svg+xml"}
+
+
+def dumps(obj, default=None):
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        )
+    return json.dumps(obj, default=default, separators=(",", ":")).encode("ascii")
+
+
+def loads(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def packb(obj):
+    """MessagePack bytes; callers check `msgpack is not None` first"""
+    return msgpack.packb(obj, use_bin_type=True)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """jsonify() without key sorting or pretty-printing, encoded by dumps()"""
+
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=self.default).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, default=self.default) + b"\n", mimetype=self.mimetype)
+
+
+#--------------------------------------------compression------------------------------------------------------#
+
+def negotiate_encoding(accept_encoding):
+    """"br", "gzip" or None: the best encoding the client accepts (q > 0) that we can produce"""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            accepted[coding.strip().lower()] = q
+    wildcard = accepted.get("*", 0.0)
+    for coding in (("br", "gzip") if brotli is not None else ("gzip",)):
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return None
+
+
+def compress(data, encoding, gzip_level=5, br_quality=4):
+    if encoding == "br":
+        return brotli.compress(data, quality=br_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def enable_compression(app, min_bytes=COMPRESS_MIN_BYTES, gzip_level=5, br_quality=4):
+    """Compresses buffered JSON/text responses of at least min_bytes for clients that accept it"""
+
+    @app.after_request
+    def _compress(response):
+        if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+                or response.status_code >= 300 or response.status_code == 204
+                or "Content-Encoding" in response.headers):
+            return response
+        mimetype = response.mimetype or ""
+        if not (mimetype.startswith("text/") or mimetype in COMPRESSIBLE_MIMETYPES):
+            return response
+        if (response.content_length or 0) < min_bytes:
+            return response
+
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate_encoding(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+        response.set_data(compress(response.get_data(), encoding, gzip_level, br_quality))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)  # same content, different bytes
+        return response
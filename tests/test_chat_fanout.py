@@ -0,0 +1,132 @@
+"""Multi-worker fan-out: workers sharing a chat store and an SQLite pub/sub deliver every
+message to every worker's clients and serve the same history (see benchmarks/chat_fanout.py).
+
+Needs the test requirements (pip install -r requirements-test.txt); skipped without them."""
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import pytest
+
+socketio = pytest.importorskip("socketio")
+pytest.importorskip("websocket")          # websocket-client, for transports=["websocket"]
+pytest.importorskip("simple_websocket")   # websocket support in the worker processes
+
+REPO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+WORKER = """
+import sys
+sys.path.insert(0, {repo!r})
+import run
+run.init_db()
+run.allRoutes.socketio.run(run.app, host="127.0.0.1", port=int(sys.argv[1]), allow_unsafe_werkzeug=True,
+                           log_output=False)
+"""
+
+WORKERS = 3
+MESSAGES = 30
+GROUP = "fanout-check"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def http(method, url, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(req, timeout=5) as resp:
+        return json.loads(resp.read())
+
+
+def wait_until_up(url, proc, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            http("GET", url + "/get_groups")
+            return
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.1)
+    raise RuntimeError(f"worker at {url} did not start")
+
+
+@pytest.fixture
+def worker_urls(tmp_path):
+    env = dict(
+        os.environ,
+        DATABASE_URL="sqlite:///" + str(tmp_path / "users.db"),
+        NOTIFICATIONS_DATABASE_URL="sqlite:///" + str(tmp_path / "notifications.db"),
+        CHAT_STORE_DIR=str(tmp_path / "chat_store"),
+        SECRET_KEY="fanout-check",  # shared, so a token from one worker is valid on all
+        CHAT_MESSAGE_QUEUE="sqlite:///" + str(tmp_path / "pubsub.db"),
+        AI_CLIENT="fake"
+    )
+    env.pop("CHAT_SEARCH_DB", None)
+    ports = [free_port() for _ in range(WORKERS)]
+    procs = [
+        subprocess.Popen([sys.executable, "-c", WORKER.format(repo=REPO), str(port)], cwd=str(tmp_path), env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for port in ports
+    ]
+    try:
+        urls = [f"http://127.0.0.1:{port}" for port in ports]
+        for url, proc in zip(urls, procs):
+            wait_until_up(url, proc)
+        yield urls
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait()
+
+
+def test_every_worker_delivers_every_message(worker_urls):
+    http("POST", worker_urls[0] + "/create_group", {"group_name": GROUP, "email": "owner@example.com"})
+
+    received = [set() for _ in worker_urls]
+    lock = threading.Lock()
+    clients = []
+    try:
+        for i, url in enumerate(worker_urls):
+            client = socketio.Client(reconnection=False)
+
+            def on_message(msg, i=i):
+                with lock:
+                    received[i].add(msg["message"])
+
+            client.on("receive_message", on_message)
+            client.connect(url, transports=["websocket"], wait_timeout=10)
+            client.call("join", {"group_name": GROUP, "email": f"user{i}@example.com"}, timeout=10)
+            clients.append(client)
+
+        sent = {f"message {n}" for n in range(MESSAGES)}
+        for n in range(MESSAGES):
+            clients[n % len(clients)].emit("send_message", {
+                "group_name": GROUP, "email": f"user{n % len(clients)}@example.com", "message": f"message {n}"
+            })
+
+        deadline = time.time() + 15
+        while time.time() < deadline and any(len(got) < MESSAGES for got in received):
+            time.sleep(0.05)
+    finally:
+        for client in clients:
+            client.disconnect()
+
+    for got in received:
+        assert got == sent
+
+    histories = [
+        [msg["message"] for msg in http("GET", f"{url}/get_group_chats?group_name={GROUP}&limit=500")]
+        for url in worker_urls
+    ]
+    assert all(history == histories[0] for history in histories)
+    assert sorted(histories[0]) == sorted(sent)
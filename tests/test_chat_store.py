@@ -0,0 +1,161 @@
+import pytest
+
+import chatStore
+from chatStore import ChatStore
+
+GROUP = "algebra"
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ChatStore(str(tmp_path / "chat_store"))
+    store.create_group(GROUP, "owner@example.com")
+    return store
+
+
+def append(store, count, start=0):
+    first = store.append_messages(GROUP, [
+        {"from": "owner@example.com", "timestamp": "2025-01-01 00:00:00", "message": f"message {n}"}
+        for n in range(start, start + count)
+    ])
+    return list(range(first, first + count))
+
+
+def texts(page):
+    return [msg["message"] for msg in page["messages"]]
+
+
+#--------------------------------------------paging------------------------------------------------------#
+
+def test_ids_are_stable_and_consecutive(store):
+    assert append(store, 3) == [1, 2, 3]
+    assert append(store, 2, start=3) == [4, 5]
+    assert [msg["id"] for msg in store.get_messages(GROUP)] == [1, 2, 3, 4, 5]
+
+
+def test_newest_page_first_then_scroll_back(store):
+    append(store, 25)
+
+    page = store.read_messages(GROUP, limit=10)
+    assert [msg["id"] for msg in page["messages"]] == list(range(16, 26))
+    assert page["total"] == 25
+    assert page["has_more_before"] and not page["has_more_after"]
+
+    page = store.read_messages(GROUP, before=16, limit=10)
+    assert [msg["id"] for msg in page["messages"]] == list(range(6, 16))
+    assert page["has_more_before"] and page["has_more_after"]
+
+    page = store.read_messages(GROUP, before=6, limit=10)
+    assert texts(page) == [f"message {n}" for n in range(5)]
+    assert not page["has_more_before"] and page["has_more_after"]
+
+
+def test_after_cursor_catches_up(store):
+    append(store, 5)
+    page = store.read_messages(GROUP, after=3, limit=10)
+    assert [msg["id"] for msg in page["messages"]] == [4, 5]
+    assert page["has_more_before"] and not page["has_more_after"]
+    assert store.read_messages(GROUP, after=5)["messages"] == []
+
+
+def test_pages_survive_reopening(store, tmp_path):
+    append(store, 12)
+    reopened = ChatStore(str(tmp_path / "chat_store"))
+    page = reopened.read_messages(GROUP, before=5, limit=2)
+    assert page["messages"] == store.read_messages(GROUP, before=5, limit=2)["messages"]
+    assert append(reopened, 1, start=12) == [13]
+
+
+#--------------------------------------------delete------------------------------------------------------#
+
+def test_deleted_messages_are_skipped(store):
+    append(store, 10)
+    assert store.delete_message(GROUP, 4)
+    assert store.delete_message(GROUP, 5)
+
+    page = store.read_messages(GROUP, limit=5)
+    assert [msg["id"] for msg in page["messages"]] == [6, 7, 8, 9, 10]
+    assert page["total"] == 8
+    assert store.count_messages(GROUP) == 8
+    assert [msg["id"] for msg in store.read_messages(GROUP, before=7, limit=3)["messages"]] == [2, 3, 6]
+
+
+def test_delete_missing_or_repeated_returns_false(store):
+    append(store, 3)
+    assert not store.delete_message(GROUP, 99)
+    assert store.delete_message(GROUP, 2)
+    assert not store.delete_message(GROUP, 2)
+
+
+def test_deletes_are_seen_by_other_instances(store, tmp_path):
+    append(store, 4)
+    other = ChatStore(str(tmp_path / "chat_store"))
+    assert other.count_messages(GROUP) == 4
+    store.delete_message(GROUP, 1)
+    assert [msg["id"] for msg in other.get_messages(GROUP)] == [2, 3, 4]
+
+
+#--------------------------------------------compaction------------------------------------------------------#
+
+def test_compaction_drops_tombstoned_records_and_keeps_ids(store, tmp_path):
+    append(store, 10)
+    for message_id in (2, 3, 7):
+        store.delete_message(GROUP, message_id)
+    before = store.get_messages(GROUP)
+
+    assert store.compact_messages(GROUP) == 3
+    assert store.get_messages(GROUP) == before
+    assert store.compact_messages(GROUP) == 0
+    assert ChatStore(str(tmp_path / "chat_store")).get_messages(GROUP) == before
+    assert append(store, 1, start=10) == [11]
+
+
+def test_compaction_never_reuses_the_newest_id(store):
+    append(store, 5)
+    store.delete_message(GROUP, 5)
+    assert store.compact_messages(GROUP) == 0  # the newest record stays, tombstoned
+    assert append(store, 1, start=5) == [6]
+    assert [msg["id"] for msg in store.get_messages(GROUP)] == [1, 2, 3, 4, 6]
+
+
+def test_compact_deleted_respects_thresholds(store):
+    append(store, 100)
+    store.delete_message(GROUP, 1)
+    assert store.compact_deleted(min_deleted=5, ratio=0.5) == 0
+    for message_id in range(2, 6):
+        store.delete_message(GROUP, message_id)
+    assert store.compact_deleted(min_deleted=5, ratio=0.5) == 5
+    assert store.count_messages(GROUP) == 95
+
+
+def test_compaction_by_another_worker_mid_read(store, tmp_path):
+    append(store, 10)
+    other = ChatStore(str(tmp_path / "chat_store"))
+    for message_id in (1, 2, 3):
+        other.delete_message(GROUP, message_id)
+    expected = [msg["id"] for msg in other.get_messages(GROUP)]
+
+    index_from = store._index_from
+    def compact_first(name, f):
+        # The other worker swaps the log after we opened it but before we index it
+        store._index_from = index_from
+        other.compact_messages(GROUP)
+        return index_from(name, f)
+    store._index_from = compact_first
+
+    assert [msg["id"] for msg in store.read_messages(GROUP, limit=50)["messages"]] == expected
+
+
+def test_failed_index_read_leaves_the_index_usable(store, tmp_path, monkeypatch):
+    append(store, 3)
+    assert store.count_messages(GROUP) == 3
+    append(ChatStore(str(tmp_path / "chat_store")), 2, start=3)
+
+    def broken(line, previous):
+        raise OSError("read failed")
+    with monkeypatch.context() as patch:
+        patch.setattr(chatStore, "_line_id", broken)
+        with pytest.raises(OSError):
+            store.read_messages(GROUP)
+
+    assert [msg["id"] for msg in store.get_messages(GROUP)] == [1, 2, 3, 4, 5]
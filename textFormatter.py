@@ -0,0 +1,163 @@
+import re
+
+#--------------------------------------------AI response formatter------------------------------------------------------#
+#
+# Turns raw model output into the [{"type": "text"|"code", ...}] blocks the app renders.
+#
+#   format_response(raw_text)  whole response, one linear scan for ``` fences
+#   BlockStream                the same blocks, built incrementally from streamed chunks
+#
+# Patterns are compiled once at import, each clean_text pass is skipped when the
+# text can't match it, and bold/italic removal uses split + join (identical output
+# to sub(r'\1') but without a Python-level template expansion per match).
+#
+#-----------------------------------------------------------------------------------------------------------------------#
+
+FENCE = "```"
+
+BOLD_PATTERN = re.compile(r'\*\*(.*?)\*\*')
+ITALIC_PATTERN = re.compile(r'\*(.*?)\*')
+BULLET_PATTERN = re.compile(r'\n[-•*]')
+
+
+def clean_text(text):
+    """Removes unwanted formatting like *bold*, **bold**, and converts to bullet points"""
+    if "*" in text:
+        text = "".join(BOLD_PATTERN.split(text))  # Remove bold
+        if "*" in text:
+            text = "".join(ITALIC_PATTERN.split(text))  # Remove italics
+    if "\n" in text:
+        text = BULLET_PATTERN.sub('\n🔹 ', text)  # Ensure bullet points
+        text = text.replace("\n", "\n\n")  # Ensure proper paragraph spacing
+    return text.strip()
+
+
+def _code_block(raw_block):
+    language, _, code = raw_block.strip().partition("\n")
+    return {"type": "code", "language": language.strip(), "content": code.strip()}
+
+
+def format_response(raw_text):
+    """Splits AI response into text and code blocks"""
+    end = raw_text.find(FENCE)
+    if end == -1:
+        return [{"type": "text", "content": clean_text(raw_text)}]
+
+    formatted_blocks = []
+    start = 0
+    in_code = False
+    while True:
+        block = raw_text[start:] if end == -1 else raw_text[start:end]
+        if in_code:
+            formatted_blocks.append(_code_block(block))
+        else:
+            block = block.strip()
+            if block:
+                formatted_blocks.append({"type": "text", "content": clean_text(block)})
+        if end == -1:
+            return formatted_blocks
+        start = end + len(FENCE)
+        end = raw_text.find(FENCE, start)
+        in_code = not in_code
+
+
+class BlockStream:
+    """Incrementally splits streamed AI text into the same blocks as format_response.
+
+    feed() and close() yield events:
+      {"event": "delta", "index", "type", ["language"], "content"}  raw text as it arrives
+      {"event": "block", "index", "type", ["language"], "content"}  the finished block, exactly
+                                                                    as format_response builds it
+    """
+
+    def __init__(self):
+        self.pending = ""      # unprocessed input, may end in a partial ``` fence
+        self.parts = []        # raw text of the current block, joined when it completes
+        self.index = None      # index of the current block once announced
+        self.next_index = 0
+        self.language = None
+        self.in_code = False
+        self.saw_fence = False
+
+    def feed(self, chunk):
+        self.pending += chunk
+        while True:
+            pos = self.pending.find(FENCE)
+            if pos == -1:
+                break
+            yield from self._extend(self.pending[:pos])
+            self.pending = self.pending[pos + len(FENCE):]
+            yield from self._finish_block()
+            self.in_code = not self.in_code
+            self.saw_fence = True
+
+        # Hold back up to two trailing backticks in case the next chunk completes a fence
+        keep = min(len(self.pending) - len(self.pending.rstrip("`")), len(FENCE) - 1)
+        ready = self.pending[:len(self.pending) - keep]
+        self.pending = self.pending[len(ready):]
+        yield from self._extend(ready)
+
+    def close(self):
+        yield from self._extend(self.pending)
+        self.pending = ""
+        if not self.saw_fence:
+            # format_response cleans the unstripped text when there are no fences
+            self._announce()
+            yield {"event": "block", "index": self.index, "type": "text", "content": clean_text("".join(self.parts))}
+            return
+        yield from self._finish_block()
+
+    def _announce(self):
+        if self.index is None:
+            self.index = self.next_index
+            self.next_index += 1
+
+    def _extend(self, text):
+        if not text:
+            return
+        self.parts.append(text)
+        if self.index is None:
+            # Block not announced yet: only leading whitespace (and a code block's
+            # language line) has been seen, so joining the parts stays cheap
+            body = "".join(self.parts).lstrip()
+            if self.in_code:
+                language, newline, text = body.partition("\n")
+                if not newline:
+                    return
+                self.language = language.strip()
+            elif not body:
+                return
+            else:
+                text = body
+            self._announce()
+
+        if text:
+            if self.in_code:
+                yield {"event": "delta", "index": self.index, "type": "code", "language": self.language, "content": text}
+            else:
+                yield {"event": "delta", "index": self.index, "type": "text", "content": text}
+
+    def _finish_block(self):
+        raw_block = "".join(self.parts)
+        if self.in_code:
+            self._announce()
+            yield dict(_code_block(raw_block), event="block", index=self.index)
+        else:
+            block = raw_block.strip()
+            if block:
+                yield {"event": "block", "index": self.index, "type": "text", "content": clean_text(block)}
+        self.parts = []
+        self.index = None
+        self.language = None
+
+
+def iter_blocks(chunks):
+    """Yields format_response blocks from an iterable of text chunks as soon as each one completes"""
+    blocks = BlockStream()
+    for chunk in chunks:
+        for event in blocks.feed(chunk):
+            if event["event"] == "block":
+                yield {key: value for key, value in event.items() if key not in ("event", "index")}
+    for event in blocks.close():
+        if event["event"] == "block":
+            yield {key: value for key, value in event.items() if key not in ("event", "index")}
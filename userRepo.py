@@ -0,0 +1,141 @@
+from collections import OrderedDict, namedtuple
+import threading
+import time
+from authApp import db, User, read_session
+
+#--------------------------------------------user repository------------------------------------------------------#
+#
+# All User lookups go through here:
+#   - emails are normalized (trimmed, lowercased) and matched against the lower(email)
+#     functional index, so "Alice@Example.com" finds the row registered as alice@example.com
+#   - rows are cached as immutable UserRecords, keyed by id with an email -> id map,
+#     bounded LRU + ttl; writes made through the repository invalidate their entries
+#   - get_many_by_email resolves a whole member list with one IN query for the misses
+#
+# The cache is per process: another worker's write is seen here once the entry's
+# ttl runs out, so keep the ttl short.
+#
+#-----------------------------------------------------------------------------------------------------------------#
+
+UserRecord = namedtuple("UserRecord", ["id", "name", "surname", "email", "mobile", "password", "role"])
+
+# SQLite allows 999 bound parameters per statement on older builds
+LOOKUP_CHUNK = 500
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def _record(user):
+    return UserRecord(user.id, user.name, user.surname, user.email, user.mobile, user.password, user.role)
+
+
+class UserRepository:
+    def __init__(self, max_entries=10000, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._by_id = OrderedDict()  # id -> (expires_at, UserRecord)
+        self._ids_by_email = {}      # normalized email -> id
+        self._stats = {"hits": 0, "misses": 0, "queries": 0, "evictions": 0, "invalidations": 0}
+
+    # ---------------------------------------------- reads ---------------------------------------------- #
+
+    def get_by_email(self, email):
+        return self.get_many_by_email([email]).get(normalize_email(email))
+
+    def get_many_by_email(self, emails):
+        """{normalized email: UserRecord} for the emails that belong to a user; one query for all misses"""
+        found = {}
+        missing = []
+        for email in {normalize_email(email) for email in emails if email}:
+            with self._lock:
+                user_id = self._ids_by_email.get(email)
+            record = self._cached(user_id) if user_id is not None else None
+            if record is not None:
+                found[email] = record
+            else:
+                missing.append(email)
+
+        for start in range(0, len(missing), LOOKUP_CHUNK):
+            chunk = missing[start:start + LOOKUP_CHUNK]
+            with read_session() as session:
+                users = session.query(User).filter(db.func.lower(User.email).in_(chunk)).all()
+                records = [_record(user) for user in users]
+            self._count("queries")
+            with self._lock:
+                self._stats["misses"] += len(chunk)
+            for record in records:
+                self._store(record)
+                found[normalize_email(record.email)] = record
+        return found
+
+    # ---------------------------------------------- writes ---------------------------------------------- #
+
+    def create(self, **fields):
+        fields["email"] = normalize_email(fields["email"])
+        user = User(**fields)
+        db.session.add(user)
+        db.session.commit()
+        record = _record(user)
+        self._store(record)
+        return record
+
+    def update_password(self, user_id, old_password, new_password):
+        """Compare-and-set, so two concurrent rehashes of one row can't clobber a real password change"""
+        db.session.execute(
+            db.update(User).where(User.id == user_id, User.password == old_password).values(password=new_password)
+        )
+        db.session.commit()
+        self.invalidate(user_id)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            entry = self._by_id.pop(user_id, None)
+            if entry is not None:
+                self._ids_by_email.pop(normalize_email(entry[1].email), None)
+                self._stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._by_id.clear()
+            self._ids_by_email.clear()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._by_id)
+        stats["max_entries"] = self.max_entries
+        stats["ttl"] = self.ttl
+        return stats
+
+    # ---------------------------------------------- internals ---------------------------------------------- #
+
+    def _count(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    def _cached(self, user_id):
+        with self._lock:
+            entry = self._by_id.get(user_id)
+            if entry is None:
+                return None
+            expires_at, record = entry
+            if expires_at <= time.time():
+                del self._by_id[user_id]
+                self._ids_by_email.pop(normalize_email(record.email), None)
+                return None
+            self._by_id.move_to_end(user_id)
+            self._stats["hits"] += 1
+            return record
+
+    def _store(self, record):
+        with self._lock:
+            self._by_id[record.id] = (time.time() + self.ttl, record)
+            self._by_id.move_to_end(record.id)
+            self._ids_by_email[normalize_email(record.email)] = record.id
+            while len(self._by_id) > self.max_entries:
+                _, (_, evicted) = self._by_id.popitem(last=False)
+                self._ids_by_email.pop(normalize_email(evicted.email), None)
+                self._stats["evictions"] += 1